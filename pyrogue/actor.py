@@ -1,8 +1,8 @@
 import random
 import abc
-import copy
 from enum import Enum
 from .dungeon import *
+from .fov import Field_Of_View, Line_Of_Sight
 from .utility import *
 
 # This file contains the class information for 'actors' - Monsters, the player, and the various items.
@@ -20,6 +20,9 @@ ATTR_DESTROY____ = 0b0000_0000_0100_0000  # Bit 7
 ATTR_UNIQ_______ = 0b0000_0000_1000_0000  # Bit 8
 ATTR_BOSS_______ = 0b0000_0001_0000_0000  # Bit 9
 
+# Code in the player's terrain memory (tmem) for cells that haven't been seen; the rest are Terrain values.
+terrain_unknown = 0xFF
+
 # For defining types by string in file
 item_type_opts = {
     "POTION": 0,
@@ -71,6 +74,17 @@ def has_attribute(curr_attributes: int, new_attr: int) -> bool:
     return (curr_attributes & new_attr) != 0
 
 
+# Animation phase for the next monster / item created; spreads multi-color ones out, so they don't change color in step.
+_next_anim_phase = 0
+
+
+# Returns a new animation phase for a monster / item.
+def new_anim_phase() -> int:
+    global _next_anim_phase
+    _next_anim_phase += 1
+    return _next_anim_phase
+
+
 # Enum to define moves, whose values correspond to the move's idx in the coordinate deltas
 class Move(Enum):
     up_left = 0
@@ -233,6 +247,9 @@ class Item:
         self.r = 0
         self.c = 0
 
+        # Offset into the color cycle, for multi-color items
+        self.anim_phase = new_anim_phase()
+
     # Determines if the item can be at this position.
     def _valid_pos(self, dungeon: Dungeon, r: int, c: int) -> bool:
         """
@@ -256,6 +273,7 @@ class Item:
             self.r = r
             self.c = c
             item_map[r][c] = self
+            dungeon.mark_dirty(r, c)
             return True
         else:
             return False
@@ -274,8 +292,10 @@ class Item:
         return self.typedef.desc
 
     # Returns a str keyword for a single Tkinter color.
-    def get_color(self):
-        return self.typedef.get_single_color()
+    # Multi-color items cycle through their colors, one per animation frame.
+    def get_color(self, frame: int = 0):
+        colors = self.typedef.colors
+        return colors[(frame + self.anim_phase) % len(colors)]
 
     def is_unique(self):
         return self.typedef.artifact
@@ -489,6 +509,7 @@ class Actor(abc.ABC):
             self.r = r
             self.c = c
             actor_map[r][c] = self
+            dungeon.mark_dirty(r, c)
             return True
         else:
             return False
@@ -514,9 +535,9 @@ class Actor(abc.ABC):
     def get_char(self) -> str:
         pass
 
-    # Returns a color for the character of the actor.
+    # Returns a color for the character of the actor, at a given animation frame.
     @abc.abstractmethod
-    def get_color(self) -> str:
+    def get_color(self, frame: int = 0) -> str:
         pass
 
     # Sets the current turn of the given actor.
@@ -555,6 +576,7 @@ class Actor(abc.ABC):
                 # Attempt to place in inventory; fails if no room
                 if self._place_in_inventory(item):
                     item_map[r][c] = None
+                    dungeon.mark_dirty(r, c)
                     return True, item
         return False, None
 
@@ -612,8 +634,12 @@ class Player(Actor):
         # Base damage for the player, assuming that it has no other weapons
         self.fisticuffs_dice = Dice(0, 2, 6)
 
-        self.tmem = []  # To have memory of dungeon terrain
-        self.visible_tiles = []  # to Tag currently visible tiles
+        # To have memory of dungeon terrain; flat, row-major grid of terrain codes, terrain_unknown where not seen yet.
+        # Made for each dungeon in init_pos.
+        self.tmem = bytearray()
+        self.explored = 0  # Count of cells in tmem that have been seen
+        self.fov = None  # What the player can currently see; made for each dungeon in init_pos
+        self.los = None  # Which cells have line of sight to the player; made for each dungeon in init_pos
 
         # Player inventory / equipment slots
         self.inventory_size = 10  # Carry slot limit; intended to be a hard value
@@ -629,128 +655,24 @@ class Player(Actor):
             "ring_r": None,
         }
 
-    # Gets the correct information for an octant, or part of the scan circle for player visually scanning dungeon.
-    def _get_octant_transform(self, octant):
-        """
-        Return the transformation matrix for the given octant.
-        These are used to rotate the FOV scan into the correct direction.
-        """
-        # Each tuple: (xx, xy, yx, yy)
-        # These control how dx/dy are applied to reach other octants
-        mult = [
-            (1, 0, 0, 1),  # Octant 0: E
-            (0, 1, 1, 0),  # Octant 1: NE
-            (-1, 0, 0, 1),  # Octant 2: W
-            (0, -1, 1, 0),  # Octant 3: SE
-            (-1, 0, 0, -1),  # Octant 4: W2
-            (0, -1, -1, 0),  # Octant 5: SW
-            (1, 0, 0, -1),  # Octant 6: E2
-            (0, 1, -1, 0),  # Octant 7: NW
-        ]
-        return mult[octant]
-
-    # Shadowcasting helper method for determining what the player can 'see'.
-    def _cast_light(
-        self, row, start_slope, end_slope, xx, xy, yx, yy, dungeon: Dungeon
-    ):
-        """
-        Recursively 'casts light' in a given octant from the player (source_x, source_y),
-        effectively finding tiles that are visible to the PC in that octant.
-
-        Parameters:
-            source_x, source_y      — origin (player position)
-            radius      — max vision distance
-            row         — current row (distance from origin)
-            start_slope — left bound of current scan sector
-            end_slope   — right bound of current scan sector
-            xx, xy,
-            yx, yy      — octant transform multipliers (from get_octant_transform)
-            map_data    — 2D list of map tiles
-            visible     — set collecting visible tile coordinates
-        """
-
-        source_x = self.c
-        source_y = self.r
-        radius = self.view_dist
-
-        # Stop if the current scan sector is invalid
-        if start_slope < end_slope:
-            return
-
-        for i in range(row, radius + 1):
-            dx = -i
-            blocked = False
-            new_start = start_slope
-
-            while dx <= 0:
-                dy = -i
-                # Map coordinates for this octant
-                X = source_x + dx * xx + dy * xy
-                Y = source_y + dx * yx + dy * yy
-
-                # Compute slopes
-                l_slope = (dx - 0.5) / (dy + 0.5)
-                r_slope = (dx + 0.5) / (dy - 0.5)
-
-                # Skip tile if outside of this field-of-view segment
-                if r_slope > start_slope:
-                    dx += 1
-                    continue
-                elif l_slope < end_slope:
-                    break
-
-                # Bounds check
-                if dungeon.valid_point(Y, X):
-                    dist = dx * dx + dy * dy
-
-                    # Check if new point is rock (wall)
-                    is_wall = dungeon.get_terrain_at(Y, X) in {
-                        Dungeon.Terrain.stdrock,
-                        Dungeon.Terrain.immrock,
-                    }
-
-                    if dist <= radius * radius:
-                        self.tmem[Y][X] = dungeon.get_terrain_at(Y, X)
-                        # hard check to make sure walls aren't marked as visible by mistake
-                        if not is_wall:
-                            self.visible_tiles[Y][X] = True
-
-                    if blocked:
-                        if is_wall:
-                            new_start = r_slope  # Wall continues
-                        else:
-                            blocked = False
-                            start_slope = new_start
-                    else:
-                        if is_wall and i < radius:
-                            blocked = True
-                            self._cast_light(
-                                i + 1, start_slope, l_slope, xx, xy, yx, yy, dungeon
-                            )
-                            new_start = r_slope
-
-                dx += 1
-            if blocked:
-                break
-
-    # Starts recursive shadowcasting to determine what the player can 'see'.
+    # Updates what the player can see, and remembers the terrain it sees.
     def _update_terrain_memory(self, dungeon: Dungeon):
         """
-        Compute what the player can see from its current location using recursive shadowcasting.
+        Compute what the player can see from its current location using shadowcasting (see fov.py).
         Updates player.tmem, which is the player's remembered dungeon terrain.
+        What changed is collected in the field of view's diff, for the renderer to take.
         """
-        self.visible_tiles = [
-            [False] * dungeon.get_width() for _ in range(dungeon.get_height())
-        ]
-
-        cx = self.c
-        cy = self.r
-        self.tmem[cy][cx] = dungeon.get_terrain_at(cy, cx)
-        self.visible_tiles[cy][cx] = True
-
-        for octant in range(8):
-            # Process all 8 octants
-            self._cast_light(1, 1, 0, *self._get_octant_transform(octant), dungeon)
+        diff = self.fov.update(dungeon, self.r, self.c, self.view_dist)
+        tmem = self.tmem
+        tmap = dungeon.tmap
+        for idx in self.fov.lit_cells:
+            code = tmap[idx]
+            if tmem[idx] != code:
+                if tmem[idx] == terrain_unknown:
+                    self.explored += 1
+                tmem[idx] = code
+                diff.remembered.append(idx)
+        self.fov.add_remembered(diff.remembered)
 
     # Determines if the player can be at this position.
     def _valid_pos(self, dungeon: Dungeon, r: int, c: int) -> bool:
@@ -763,10 +685,14 @@ class Player(Actor):
     def _force_pos_update(self, dungeon: Dungeon, actor_map: list, r: int, c: int):
         actor_map[self.r][self.c] = None
         actor_map[r][c] = self
+        dungeon.mark_dirty(self.r, self.c)
+        dungeon.mark_dirty(r, c)
         self.r = r
         self.c = c
         # Update the player's knowledge of the dungeon.
         self._update_terrain_memory(dungeon)
+        # Monster pathfinding measures distance to the player
+        dungeon.calc_dist_maps(r, c)
 
     # Rolls dice to determine dmg output in melee combat
     def _dmg_roll_melee(self) -> int:
@@ -825,10 +751,10 @@ class Player(Actor):
     # Player specific implementation for initializing position in dungeon
     def init_pos(self, dungeon: Dungeon, actor_map: list, r: int, c: int) -> bool:
         # Clear the player's memory of the dungeon.
-        self.tmem = [
-            [Dungeon.Terrain.debug] * dungeon.get_width()
-            for _ in range(dungeon.get_height())
-        ]
+        self.tmem = bytearray([terrain_unknown]) * (dungeon.get_height() * dungeon.get_width())
+        self.explored = 0
+        self.fov = Field_Of_View(dungeon.get_height(), dungeon.get_width())
+        self.los = Line_Of_Sight(dungeon.get_height(), dungeon.get_width())
 
         if (
             dungeon.valid_point(r, c)
@@ -838,9 +764,12 @@ class Player(Actor):
             self.r = r
             self.c = c
             actor_map[r][c] = self
+            dungeon.mark_dirty(r, c)
 
             # Initialize the player's memory of the dungeon
             self._update_terrain_memory(dungeon)
+            # Monster pathfinding measures distance to the player
+            dungeon.calc_dist_maps(r, c)
 
             return True
         else:
@@ -1044,14 +973,17 @@ class Player(Actor):
             # No actor; move
             dmg = 0
             self._force_pos_update(dungeon, actor_map, new_r, new_c)
-            dungeon.calc_dist_maps(new_r, new_c)
 
         # For combat dialog
         return True, a, dmg
 
+    # Returns true/false for if there is a straight line, clear of rock, from tile at row, col to the player.
+    def is_seen_from(self, dungeon: Dungeon, row: int, col: int) -> bool:
+        return self.los.has_los(dungeon, row, col, self.r, self.c)
+
     # Returns true/false for if tile at row, col is visible to the player.
     def is_visible_tile(self, row, col):
-        return self.visible_tiles[row][col]
+        return self.fov.is_visible(row, col)
 
     # Returns the character representation of the player.
     def get_char(self) -> str:
@@ -1061,7 +993,7 @@ class Player(Actor):
         return "=== PLAYER ==="
 
     # Returns a color for the character of the actor.
-    def get_color(self) -> str:
+    def get_color(self, frame: int = 0) -> str:
         return "gold"
 
     def get_hp_cap(self) -> int:
@@ -1125,6 +1057,8 @@ class Player(Actor):
                         item_list.append(item)
                     self.inventory[idx] = None
                     item_map[self.r][self.c] = item
+                    item.r, item.c = self.r, self.c
+                    dungeon.mark_dirty(self.r, self.c)
                     return True, item
         return False, item
 
@@ -1159,6 +1093,12 @@ class Player(Actor):
 # This is the class for monsters and their turn/movement methods.
 class Monster(Actor):
 
+    # Class for a straightline path; only the points on the line are stored.
+    # Indexed like a distance map (row * width + col), with every other point unreachable.
+    class Straight_Path(dict):
+        def __missing__(self, idx):
+            return dist_unreached
+
     # Monster constructor
     def __init__(self, typedef: Monster_Typedef):
         # Declare fields for location
@@ -1167,6 +1107,8 @@ class Monster(Actor):
         self.typedef = typedef
         # Monster's 'path'; this is a distance map of the dungeon to determine where to move next
         self.path = []
+        # Flow field that goes with the path, if it's a distance map (see Dungeon.get_flow_at); None otherwise
+        self.path_flow = None
         # Speed modifier; lower is better
         self.speed = typedef.speed_dice.roll()
         # bitfield to indicate what sort of attributes that the monster has
@@ -1176,6 +1118,8 @@ class Monster(Actor):
         # Declare the monster as initially alive
         self.alive = True
         self.hp = typedef.hp_dice.roll()
+        # Offset into the color cycle, for multi-color monsters
+        self.anim_phase = new_anim_phase()
 
         # Monster inventory
         self.inventory_size = 3  # Carry slot limit; intended to be a hard value
@@ -1190,11 +1134,13 @@ class Monster(Actor):
         return self.typedef.name
 
     # Returns a color for the character of the actor.
-    def get_color(self) -> str:
+    def get_color(self, frame: int = 0) -> str:
         """
         Returns a string for a Tkinter color that the monster's sybol is intended to be.
+        Multi-color monsters cycle through their colors, one per animation frame (from their own phase).
         """
-        return self.typedef.colors[random.randint(0, len(self.typedef.colors) - 1)]
+        colors = self.typedef.colors
+        return colors[(frame + self.anim_phase) % len(colors)]
 
     # Returns the list of lines for the monster's description.
     def get_desc(self) -> list:
@@ -1295,6 +1241,8 @@ class Monster(Actor):
         if item_map[self.r][self.c] == None:
             # Location empty, so dropping onto the dungeon floor
             item_map[self.r][self.c] = item
+            item.r, item.c = self.r, self.c
+            dungeon.mark_dirty(self.r, self.c)
             # Add item to the list of items
             if item not in item_list:
                 item_list.append(item)
@@ -1317,6 +1265,8 @@ class Monster(Actor):
                     and item_map[new_r][new_c] == None
                 ):
                     item_map[new_r][new_c] = item
+                    item.r, item.c = new_r, new_c
+                    dungeon.mark_dirty(new_r, new_c)
                     # Add item to the list of items
                     if item not in item_list:
                         item_list.append(item)
@@ -1344,35 +1294,7 @@ class Monster(Actor):
 
     # Determines if the monster has a line of sight to the player; returns True if so, False otherwise.
     def _has_pc_los(self, dungeon: Dungeon, player: Player) -> bool:
-        dest_r, dest_c = player.get_pos()
-        curr_r, curr_c = self.get_pos()
-        diff_r = abs(dest_r - curr_r)
-        diff_c = abs(dest_c - curr_c)
-        step_dir_r = 0 if curr_r == dest_r else (1 if curr_r < dest_r else -1)
-        step_dir_c = 0 if curr_c == dest_c else (1 if curr_c < dest_c else -1)
-        error = diff_c - diff_r
-
-        # Scan from the monster's position, moving towards the player's location.
-        while True:
-            # Check if there is rock in the way
-            if dungeon.get_rock_at(curr_r, curr_c) > 0:
-                # Rock is in the way; no line of sight, so return False.
-                return False
-
-            # Check if scan has reached the player
-            if curr_r == dest_r and curr_c == dest_c:
-                # Reached the player; so line of sight established and return True.
-                return True
-
-            # Iterate towards the PC
-            e2 = 2 * error
-            if e2 > -diff_r:
-                error -= diff_r
-                curr_c += step_dir_c
-
-            if e2 < diff_c:
-                error += diff_c
-                curr_r += step_dir_r
+        return player.is_seen_from(dungeon, self.r, self.c)
 
     # Calculates a straightline path to the player character.
     def _calc_straight_path(self, dungeon: Dungeon, player: Player):
@@ -1386,15 +1308,15 @@ class Monster(Actor):
         error = diff_c - diff_r
         # dist is to give the path a useful weight to use when deciding where to go
         dist = 0
-        # Init path to 'infinite' weight at every point; slow, but prevents multiple paths overlapping if LOS broken and regained
-        self.path = [
-            [float("inf")] * dungeon.get_width() for _ in range(dungeon.get_height())
-        ]
+        width = dungeon.get_width()
+        # Start a new path, unreachable everywhere off the line; prevents multiple paths overlapping if LOS broken and regained
+        self.path = self.Straight_Path()
+        self.path_flow = None
 
         # Scan from the player's position, moving towards the monster's location.
         while True:
             # Update the path for distance from player
-            self.path[curr_r][curr_c] = dist
+            self.path[curr_r * width + curr_c] = dist
 
             if curr_r == dest_r and curr_c == dest_c:
                 # Reached the monster's position; stop here
@@ -1428,6 +1350,7 @@ class Monster(Actor):
                 if new_hp <= 0:
                     a.kill()
                     actor_map[dest_r][dest_c] = None
+                    dungeon.mark_dirty(dest_r, dest_c)
                 else:
                     a.hp = new_hp
                 return dam
@@ -1454,16 +1377,21 @@ class Monster(Actor):
                 actor_map[new_r][new_c] = a
                 a.r = new_r
                 a.c = new_c
+                dungeon.mark_dirty(new_r, new_c)
 
                 # Move self into vacated spot
                 actor_map[dest_r][dest_c] = self
                 actor_map[self.r][self.c] = None
+                dungeon.mark_dirty(dest_r, dest_c)
+                dungeon.mark_dirty(self.r, self.c)
                 self.r = dest_r
                 self.c = dest_c
 
                 return 0
 
         # If displacement failed, swap positions
+        dungeon.mark_dirty(self.r, self.c)
+        dungeon.mark_dirty(dest_r, dest_c)
         actor_map[self.r][self.c] = a
         a.r = self.r
         a.c = self.c
@@ -1499,6 +1427,8 @@ class Monster(Actor):
                     # Update the actor map + position information
                     actor_map[self.r][self.c] = None
                     actor_map[new_r][new_c] = self
+                    dungeon.mark_dirty(self.r, self.c)
+                    dungeon.mark_dirty(new_r, new_c)
                     self.r = new_r
                     self.c = new_c
             else:
@@ -1506,6 +1436,8 @@ class Monster(Actor):
                 # Update the actor map + position information
                 actor_map[self.r][self.c] = None
                 actor_map[new_r][new_c] = self
+                dungeon.mark_dirty(self.r, self.c)
+                dungeon.mark_dirty(new_r, new_c)
                 self.r = new_r
                 self.c = new_c
                 # If PICKUP or DESTROY monster, attemt item pickup/destruction
@@ -1537,24 +1469,29 @@ class Monster(Actor):
 
     # Monster moves based on its path.
     def _path_move(self, dungeon: Dungeon, actor_map: list, item_map: list):
-        # Definine the min cost to be infinite to start
-        min_cost = float("inf")
-        minc_pt_idx = None
-        # Find minimum cost point in surrounding 8
-        for pt_idx in range(8):
-            # Grabs the new point
-            new_r, new_c = self.target_pos(Move(pt_idx))
-            if dungeon.valid_point(new_r, new_c):
-                cost = self.path[new_r][new_c]
-                if cost < min_cost:
-                    # Better, so overwrite minimum cost point
-                    min_cost = cost
-                    minc_pt_idx = pt_idx
-
-        # Error handling for unlikely scenario that no ideal move was found; so stay put.
-        if minc_pt_idx == None:
-            # No min cost point was found; so don't move anywhere.
-            minc_pt_idx = 8
+        if self.path_flow is not None:
+            # Distance map path; the dungeon keeps track of the minimum cost point in surrounding 8
+            minc_pt_idx = dungeon.get_flow_at(self.path, self.path_flow, self.r, self.c)
+        else:
+            # Definine the min cost to be unreachable to start
+            min_cost = dist_unreached
+            minc_pt_idx = None
+            width = dungeon.get_width()
+            # Find minimum cost point in surrounding 8
+            for pt_idx in range(8):
+                # Grabs the new point
+                new_r, new_c = self.target_pos(Move(pt_idx))
+                if dungeon.valid_point(new_r, new_c):
+                    cost = self.path[new_r * width + new_c]
+                    if cost < min_cost:
+                        # Better, so overwrite minimum cost point
+                        min_cost = cost
+                        minc_pt_idx = pt_idx
+
+            # Error handling for unlikely scenario that no ideal move was found; so stay put.
+            if minc_pt_idx == None:
+                # No min cost point was found; so don't move anywhere.
+                minc_pt_idx = 8
 
         # Now attempt to move to that minimum cost point
         new_r, new_c = self.target_pos(Move(minc_pt_idx))
@@ -1574,21 +1511,25 @@ class Monster(Actor):
                 if has_attribute(self.attributes, ATTR_TUNNEL_____):
                     # Tunneler, get tunneling distance map.
                     self.path = dungeon.get_tunneling_distmap()
+                    self.path_flow = dungeon.get_tunneling_flow()
                     return True
                 else:
                     # Not a tunneler, get walking distance map.
                     self.path = dungeon.get_walking_distmap()
+                    self.path_flow = dungeon.get_walking_flow()
                     return True
             else:
                 # Monster is intelligent, but not telepathic. Need to check for line of sight.
                 if self._has_pc_los(dungeon, player):
-                    # Has line of sight, so need to check which distance map monster should recieve a copy of.
-                    # Also: Copy instead of direct assignment to emmulate 'memory' of last PC sighting.
+                    # Has line of sight, so need to check which distance map monster should recieve a snapshot of.
+                    # Also: Snapshot instead of the live map to emmulate 'memory' of last PC sighting.
                     if has_attribute(self.attributes, ATTR_TUNNEL_____):
-                        self.path = copy.deepcopy(dungeon.get_tunneling_distmap())
+                        self.path = dungeon.get_tunneling_snapshot()
+                        self.path_flow = dungeon.get_tunneling_flow()
                         return True
                     else:
-                        self.path = copy.deepcopy(dungeon.get_walking_distmap())
+                        self.path = dungeon.get_walking_snapshot()
+                        self.path_flow = dungeon.get_walking_flow()
                         return True
         else:
             if has_attribute(self.attributes, ATTR_TELEPATHIC_):
@@ -0,0 +1,378 @@
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+from types import SimpleNamespace
+from .actor import Move, Player, Monster
+from .dungeon import Dungeon
+from .engine import Pyrogue_Engine, dungeon_size_setting, difficulty_setting
+from .parsedesc import parse_monster_typedefs, parse_item_typedefs
+
+# This file contains benchmarks for timing parts of the game outside of the Tkinter UI.
+# Run with: pyrogue-bench (or python -m pyrogue.bench); see pyrogue-bench --help for options.
+
+
+# Times full dungeon generation (rock map, rooms, corridors, staircases) for one map size.
+# Returns the list of per-dungeon generation times in seconds.
+def bench_generation(size_h: int, size_w: int, runs: int, seed: int) -> list:
+    times = []
+    for run in range(runs):
+        # Fixed seeds so that every run of the benchmark generates the same dungeons
+        random.seed(seed + run)
+        dungeon = Dungeon(size_h, size_w)
+        # Generation prints room / staircase counts; keep that out of the benchmark output
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            dungeon.generate_dungeon()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+# Times calls to chosen methods, adding their times up by phase (pathing, FOV, ...).
+# Times are exclusive; time spent in a timed method called by another timed method only counts for its own phase.
+class Phase_Timer:
+    def __init__(self):
+        self.times = {}  # {phase: seconds}
+        self.calls = {}  # {phase: number of calls}
+        self._child_times = []  # Time spent in timed calls made by each timed call in progress
+        self._wrapped = []  # (owner, name, original method) for each wrapped method
+
+    # Replaces the method owner.name (owner being a class) with one that is timed as part of phase.
+    def wrap(self, owner, name: str, phase: str):
+        original = owner.__dict__[name]
+        self.times.setdefault(phase, 0.0)
+        self.calls.setdefault(phase, 0)
+
+        def timed(*args, **kwargs):
+            self._child_times.append(0.0)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                child_time = self._child_times.pop()
+                if self._child_times:
+                    self._child_times[-1] += elapsed
+                self.times[phase] += elapsed - child_time
+                self.calls[phase] += 1
+
+        setattr(owner, name, timed)
+        self._wrapped.append((owner, name, original))
+
+    # Puts every wrapped method back.
+    def restore(self):
+        for owner, name, original in reversed(self._wrapped):
+            setattr(owner, name, original)
+        self._wrapped = []
+
+
+# The methods timed for the phase breakdown of bench_throughput; (class, method name, phase)
+timed_phases = [
+    (Dungeon, "_update_distmap", "pathing"),
+    (Monster, "_update_path", "pathing"),
+    (Player, "_update_terrain_memory", "fov"),
+    (Monster, "_has_pc_los", "fov"),
+    (Monster, "handle_turn", "ai"),
+    (Player, "handle_turn", "player"),
+]
+
+
+# Random-walk player; returns a random move, or no move if none of the tried moves are possible.
+def random_walk_player(engine: Pyrogue_Engine) -> Move:
+    for _ in range(8):
+        move = Move(random.randrange(9))
+        r, c = engine.player.target_pos(move)
+        if engine.dungeon.get_rock_at(r, c) == 0:
+            return move
+    return Move(Move.none)
+
+
+# Plays levels of the game without a UI, each one a new game, with player_policy choosing the player's moves.
+# Each level ends after the given number of player turns, or at game over. The player can't be killed, so that
+# every level runs its full number of turns, however many monsters there are.
+# Returns a dict of the results; turns per second, level generation times, time per phase (see timed_phases),
+# and how often the player's field of view was found in its cache.
+def bench_throughput(
+    size_h: int,
+    size_w: int,
+    difficulty: float,
+    levels: int,
+    turns: int,
+    seed: int,
+    monster_type_list: list,
+    item_type_list: list,
+    player_policy=random_walk_player,
+) -> dict:
+    gen_times = []
+    player_turns = 0
+    fov_cache_hits = 0
+    fov_cache_misses = 0
+    run_time = 0.0
+    timer = Phase_Timer()
+    for level in range(levels):
+        random.seed(seed + level)
+        # Generation prints monster / item counts; keep that out of the benchmark output
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            engine = Pyrogue_Engine(
+                size_h, size_w, difficulty, monster_type_list, item_type_list
+            )
+            gen_times.append(time.perf_counter() - start)
+            engine.player.hp_cap = engine.player.hp = sys.maxsize
+
+            for owner, name, phase in timed_phases:
+                timer.wrap(owner, name, phase)
+            try:
+                start = time.perf_counter()
+                level_turns = 0
+                while level_turns < turns and not engine.game_over:
+                    engine.run_turns()
+                    if engine.awaiting_player:
+                        engine.player.force_max_health()
+                        if engine.player_move(player_policy(engine)):
+                            engine.end_player_turn()
+                            level_turns += 1
+                    engine.take_events()
+                run_time += time.perf_counter() - start
+            finally:
+                timer.restore()
+            player_turns += level_turns
+            fov_cache_hits += engine.player.fov.cache_hits
+            fov_cache_misses += engine.player.fov.cache_misses
+
+            # Unique monsters / items are only generated once per game; make them available to the next level
+            engine.reset_gen_eligibility(True)
+
+    phase_times = dict(timer.times)
+    phase_times["other"] = max(run_time - sum(timer.times.values()), 0.0)
+    return {
+        "size": [size_h, size_w],
+        "difficulty": difficulty,
+        "levels": levels,
+        "player_turns": player_turns,
+        "monster_turns": timer.calls["ai"],
+        "seconds": run_time,
+        "turns_per_sec": player_turns / run_time if run_time > 0 else 0.0,
+        "gen_ms_mean": sum(gen_times) / len(gen_times) * 1000,
+        "gen_ms_max": max(gen_times) * 1000,
+        "phase_ms": {phase: t * 1000 for phase, t in phase_times.items()},
+        "fov_cache_hits": fov_cache_hits,
+        "fov_cache_misses": fov_cache_misses,
+    }
+
+
+# Wraps an object (a Tkinter canvas), counting calls made to each of its methods.
+class Call_Counter:
+    def __init__(self, target):
+        self.target = target
+        self.counts = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self.target, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.counts[name] = self.counts.get(name, 0) + 1
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+# Plays a game with random player moves, counting the canvas calls made while rendering it.
+# Needs Tkinter and a display; raises RuntimeError if either is missing.
+# Returns the number of player turns played and the {method: count} of canvas calls.
+def bench_render_calls(size_h: int, size_w: int, difficulty: float, turns: int, seed: int):
+    # Only this benchmark needs the UI; the rest of the benchmarks run without Tkinter
+    try:
+        import tkinter as tk
+        from .game import Pyrogue_Game
+    except ImportError as err:
+        raise RuntimeError(f"Tkinter is not available ({err})")
+
+    monster_type_list = []
+    item_type_list = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_monster_typedefs(monster_type_list)
+        parse_item_typedefs(item_type_list)
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as err:
+        raise RuntimeError(f"Tkinter needs a display ({err})")
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        game = Pyrogue_Game(
+            None,
+            root,
+            (size_h + 3) * 16,
+            size_w * 16,
+            size_h,
+            size_w,
+            difficulty,
+            monster_type_list,
+            item_type_list,
+            False,
+        )
+        # Count from after the first frame, which creates the canvas items for the layout
+        game._render_frame(game.scrsize_h, game.scrsize_w)
+        counter = Call_Counter(game.canvas)
+        game.canvas = counter
+
+        played = 0
+        while played < turns:
+            # Run the turnloop until it waits on the player
+            while game.curr_input_mode != game.input_modes["player_turn"] and not game.engine.game_over:
+                root.update()
+            if game.engine.game_over:
+                break
+            game._on_key_press(SimpleNamespace(keysym=random.choice("12346789")))
+            played += 1
+
+    root.destroy()
+    return played, counter.counts
+
+
+# Percentage of lookups that were cache hits.
+def _hit_percent(hits: int, misses: int) -> float:
+    return hits / (hits + misses) * 100 if hits + misses else 0.0
+
+
+# Parses a comma separated list of preset indices, e.g. "0,2,5"; "all" for all of them.
+def _parse_presets(text: str, presets: dict) -> list:
+    if text == "all":
+        return list(presets)
+    idx_list = [int(idx) for idx in text.split(",")]
+    for idx in idx_list:
+        if idx not in presets:
+            raise argparse.ArgumentTypeError(f"no preset {idx}; presets are {list(presets)}")
+    return idx_list
+
+
+# Command line entry point (pyrogue-bench).
+# Runs the generation benchmark for every dungeon size preset in the main menu, then the headless throughput benchmark
+# for every size / difficulty preset asked for, printing tables of the results and optionally writing them as JSON.
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        prog="pyrogue-bench", description="Benchmarks PyRogue without its UI."
+    )
+    parser.add_argument("--runs", type=int, default=20, help="dungeons generated per size preset (default 20)")
+    parser.add_argument("--levels", type=int, default=1, help="levels played per preset (default 1)")
+    parser.add_argument("--turns", type=int, default=200, help="player turns per level, and of the render call game (default 200)")
+    parser.add_argument("--seed", type=int, default=0, help="first random seed (default 0)")
+    parser.add_argument(
+        "--sizes",
+        type=lambda text: _parse_presets(text, dungeon_size_setting),
+        default="all",
+        help="dungeon size presets to play, e.g. 0,5 (default all)",
+    )
+    parser.add_argument(
+        "--difficulties",
+        type=lambda text: _parse_presets(text, difficulty_setting),
+        default="all",
+        help="difficulty presets to play, e.g. 0,5 (default all)",
+    )
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON to PATH ('-' for stdout)")
+    parser.add_argument(
+        "--render-calls",
+        action="store_true",
+        help="also count canvas calls while rendering a game (needs a display)",
+    )
+    args = parser.parse_args(argv)
+    # Tables go to stderr when the JSON goes to stdout
+    out = sys.stderr if args.json == "-" else sys.stdout
+    results = {"seed": args.seed, "generation": [], "throughput": [], "render_calls": None}
+
+    print(f"Dungeon generation, {args.runs} dungeons per preset", file=out)
+    print(f"{'PRESET':>8} {'SIZE':>8} {'MEAN ms':>10} {'MIN ms':>10} {'MAX ms':>10}", file=out)
+    for preset, (size_h, size_w) in dungeon_size_setting.items():
+        times = bench_generation(size_h, size_w, args.runs, args.seed)
+        mean_ms = sum(times) / len(times) * 1000
+        print(
+            f"{preset:>8} {f'{size_h}x{size_w}':>8} {mean_ms:>10.2f}"
+            f" {min(times) * 1000:>10.2f} {max(times) * 1000:>10.2f}",
+            file=out,
+        )
+        results["generation"].append(
+            {
+                "preset": preset,
+                "size": [size_h, size_w],
+                "mean_ms": mean_ms,
+                "min_ms": min(times) * 1000,
+                "max_ms": max(times) * 1000,
+            }
+        )
+
+    monster_type_list = []
+    item_type_list = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_monster_typedefs(monster_type_list)
+        parse_item_typedefs(item_type_list)
+
+    phases = [phase for _, _, phase in timed_phases]
+    phases = sorted(set(phases), key=phases.index) + ["other"]
+    print(f"\nHeadless play, random-walk player, {args.levels} level(s) of {args.turns} turns per preset", file=out)
+    print(
+        f"{'SIZE':>8} {'DIFF':>6} {'TURNS':>7} {'TURNS/s':>9} {'GEN ms':>8}"
+        + "".join(f" {phase.upper() + ' ms':>11}" for phase in phases)
+        + f" {'FOV HIT%':>9}",
+        file=out,
+    )
+    for size_preset in args.sizes:
+        size_h, size_w = dungeon_size_setting[size_preset]
+        for difficulty_preset in args.difficulties:
+            difficulty = difficulty_setting[difficulty_preset]
+            result = bench_throughput(
+                size_h,
+                size_w,
+                difficulty,
+                args.levels,
+                args.turns,
+                args.seed,
+                monster_type_list,
+                item_type_list,
+            )
+            result["size_preset"] = size_preset
+            result["difficulty_preset"] = difficulty_preset
+            results["throughput"].append(result)
+            print(
+                f"{f'{size_h}x{size_w}':>8} {difficulty:>6.2f} {result['player_turns']:>7}"
+                f" {result['turns_per_sec']:>9.1f} {result['gen_ms_mean']:>8.2f}"
+                + "".join(f" {result['phase_ms'][phase]:>11.1f}" for phase in phases)
+                + f" {_hit_percent(result['fov_cache_hits'], result['fov_cache_misses']):>9.1f}",
+                file=out,
+            )
+
+    if args.render_calls:
+        size_h, size_w = dungeon_size_setting[5]
+        difficulty = difficulty_setting[5]
+        print(f"\nCanvas calls while rendering, {size_h}x{size_w}, difficulty {difficulty}, {args.turns} turns", file=out)
+        try:
+            played, counts = bench_render_calls(size_h, size_w, difficulty, args.turns, args.seed)
+        except RuntimeError as err:
+            print(f"Skipped; {err}", file=out)
+        else:
+            print(f"{'CALL':>16} {'TOTAL':>10} {'PER TURN':>10}", file=out)
+            for name, count in sorted(counts.items()):
+                print(f"{name:>16} {count:>10} {count / max(played, 1):>10.1f}", file=out)
+            results["render_calls"] = {
+                "size": [size_h, size_w],
+                "difficulty": difficulty,
+                "turns": args.turns,
+                "player_turns": played,
+                "counts": counts,
+            }
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import random
-import copy
+import heapq
+from array import array
 from .utility import PriorityQueue
 from enum import Enum
 from .utility import exp_chancetime
@@ -11,6 +12,22 @@ from collections import deque
 min_room_h = 3
 min_room_w = 4
 max_rock_hardness = 255
+# Distance map weight for cells that cannot be reached from the distance map's origin.
+# Largest value a signed 32 bit array cell can hold, so it compares greater than any real distance.
+dist_unreached = 0x7FFFFFFF
+# Cost for a tunneling monster to move into a cell, indexed by that cell's rock hardness.
+# 85 will be the amount that a tunneling monster can 'drill' per turn; i.e., the amount it can reduce hardness.
+# The immutable border (max hardness) costs 0, which marks it as impassable.
+_tunnel_step_cost = bytes(h // 85 + 1 for h in range(max_rock_hardness)) + bytes(1)
+_max_tunnel_step = max(_tunnel_step_cost)
+# Cost to walk into a cell, indexed the same way; only open floor (hardness 0) can be walked on.
+_walk_step_cost = bytes([1]) + bytes(max_rock_hardness)
+# Furthest (in rows or columns) the distance map origin can move and still be repaired rather than recalculated
+_max_origin_repair_move = 8
+# Flow field value for a cell whose next step hasn't been looked up yet
+_flow_unknown = 0xFF
+# Sight map value for each terrain code; 1 for terrain that blocks sight (rock), 0 for terrain that can be seen past.
+_terrain_blocks_sight = bytes([0, 0, 0, 1, 1]) + bytes(251)
 
 
 class Dungeon:
@@ -23,6 +40,9 @@ class Dungeon:
         stdrock = 3
         immrock = 4
 
+    # Terrain types indexed by their integer code, which is what the terrain map actually stores.
+    _terrain_by_code = tuple(Terrain)
+
     # Classes to store individual room information
     class Room:
         # Room Constructor
@@ -58,6 +78,33 @@ class Dungeon:
         def __hash__(self):
             return hash((self.r, self.c))
 
+    # Class to store a distance map used in monster pathfinding, along with what it was calculated for
+    class Distmap:
+        # Distmap Constructor
+        def __init__(self, size, step_cost):
+            # Cells store (distance - offset), so that every distance can be raised at once.
+            # Only the difference between two cells matters to path following, which ignores the offset.
+            self.dist = array("i", [dist_unreached]) * size
+            self.offset = 0
+            # Cost to move into a cell, indexed by rock hardness; 0 is impassable
+            self.step_cost = step_cost
+            # Every step costs the same, so a breadth-first search can be used instead of Dijkstra's
+            self.unit_steps = max(step_cost) == 1
+            # Origin the map currently describes; None until it is first needed
+            self.src = None
+            # Dungeon distance map stamp that the map is up to date with
+            self.stamp = -1
+            # Cells whose rock / terrain changed since the map was last updated.
+            # If any change made a cell harder to move through, the map needs to be fully recalculated instead.
+            self.changed_cells = set()
+            self.need_recalc = False
+            # Read-only view of dist handed out as a snapshot (see get_walking_snapshot); None if there isn't one.
+            # While a snapshot exists, dist is copied before it's changed in place, so holders never see it change.
+            self.snapshot = None
+            # Flow field: the direction of the cheapest next step from each cell, looked up as monsters need them.
+            # Replaced (not cleared) whenever dist changes, so it stays matched with any snapshot of the old dist.
+            self.flow = bytearray([_flow_unknown]) * size
+
     # Dungeon Constructor
     def __init__(self, size_h, size_w):
         # Size of the dungeon
@@ -69,62 +116,77 @@ class Dungeon:
         self.stairc = 0
         self.stair_list = []
 
+        # All of the dungeon maps are flat, row-major grids; cell (r, c) lives at index r * width + c.
+        size = self.height * self.width
         # Declaring the rock hardness map (used in terrain generation, pathfinding calculations)
-        self.rmap = [[0] * self.width for _ in range(self.height)]
-        # Declaring the terrain map for the dungeon
-        self.tmap = [[self.Terrain.debug] * self.width for _ in range(self.height)]
-        # Declare walking and tunneling distance maps used in monster pathfinding
-        self.walk_distmap = [[float("inf")] * self.width for _ in range(self.height)]
-        self.tunn_distmap = [[float("inf")] * self.width for _ in range(self.height)]
+        self.rmap = bytearray(size)
+        # Declaring the terrain map for the dungeon; stores Terrain values (codes), all debug to start
+        self.tmap = bytearray(size)
+        # Declare walking and tunneling distance maps used in monster pathfinding.
+        # These are only calculated when something asks for them (see calc_dist_maps).
+        self.walk_distmap = self.Distmap(size, _walk_step_cost)
+        self.tunn_distmap = self.Distmap(size, _tunnel_step_cost)
+        # Origin that the distance maps should describe (the player's position)
+        self.dist_origin = None
+        # Increases whenever the origin or the terrain changes; maps older than this are brought up to date on use
+        self.dist_stamp = 0
+        # Increases whenever rock or terrain changes after generation
+        self.terrain_version = 0
+        # Which cells block sight, made from the terrain map when first needed (see get_sight_map)
+        self.sight_map = None
+        # Increases whenever which cells block sight changes
+        self.sight_version = 0
+        # Cells (flat indices) whose displayed contents may have changed since the renderer last took them.
+        # Anything that changes terrain, actors, or items at a cell marks it (see mark_dirty).
+        # Changes to what the player sees are tracked by the player's field of view instead (see fov.py).
+        self.dirty_cells = set()
+        # Flat index offsets to the 8 surrounding cells, including diagonal
+        w = self.width
+        self._delta_idx = (-w - 1, -w, -w + 1, -1, 1, w - 1, w, w + 1)
 
     # Attempts to place a room into the dungeon terrain map
     def _place_room(self, room):
-        r = room.origin_r
-        c = room.origin_c
-        last_r = r + room.rsize_h
-        last_c = c + room.rsize_w
-
-        if self.tmap[r][c] == self.Terrain.floor:
-            # Room origin conflicts with another room
+        first_r = room.origin_r
+        first_c = room.origin_c
+        last_r = first_r + room.rsize_h - 1
+        last_c = first_c + room.rsize_w - 1
+        w = self.width
+        floor = self.Terrain.floor.value
+
+        if not (self.valid_point(first_r, first_c) and self.valid_point(last_r, last_c)):
+            # Out of bounds
             return False
 
-        # copy of the terrain & rock maps to easily revert changes if room cannot be placed
-        rmap_copy = copy.deepcopy(self.rmap)
-        tmap_copy = copy.deepcopy(self.tmap)
-
-        while r < last_r:
-            c = room.origin_c
-            while c < last_c:
-                if not self.valid_point(r, c):
-                    # Out of bounds
-                    return False
-                elif (
-                    tmap_copy[r + 1][c] == self.Terrain.floor
-                    or tmap_copy[r][c + 1] == self.Terrain.floor
-                    or tmap_copy[room.origin_r - 1][c] == self.Terrain.floor
-                    or tmap_copy[r][room.origin_c - 1] == self.Terrain.floor
-                ):
-                    # Room is either going to be adjacent to another room, or run into another room
-                    return False
-                else:
-                    # Claim as room cell on dungeon maps
-                    tmap_copy[r][c] = self.Terrain.floor
-                    rmap_copy[r][c] = 0
-                c += 1
-            r += 1
-
-        # No issue occured; Update master copy of maps and return success
-        self.rmap = copy.deepcopy(rmap_copy)
-        self.tmap = copy.deepcopy(tmap_copy)
+        # During generation the terrain map doubles as the floor occupancy bitmap.
+        # The room, plus a one cell margin on each side (corners excluded), can't contain any floor;
+        # otherwise the room is either going to be adjacent to another room, or run into another room.
+        for r in range(first_r - 1, last_r + 2):
+            if r == first_r - 1 or r == last_r + 1:
+                row_start = r * w + first_c
+                row_end = r * w + last_c + 1
+            else:
+                row_start = r * w + first_c - 1
+                row_end = r * w + last_c + 2
+            if self.tmap.find(floor, row_start, row_end) != -1:
+                return False
+
+        # No issue found; Claim the room cells on the dungeon maps and return success
+        floor_row = bytes([floor]) * room.rsize_w
+        open_row = bytes(room.rsize_w)
+        for r in range(first_r, last_r + 1):
+            row_start = r * w + first_c
+            self.tmap[row_start : row_start + room.rsize_w] = floor_row
+            self.rmap[row_start : row_start + room.rsize_w] = open_row
         return True
 
     # Attempts to place a staircase
     def _place_stair(self, staircase):
         if (
             self.valid_point(staircase.r, staircase.c)
-            and self.tmap[staircase.r][staircase.c] == self.Terrain.floor
+            and self.tmap[staircase.r * self.width + staircase.c]
+            == self.Terrain.floor.value
         ):
-            self.tmap[staircase.r][staircase.c] = self.Terrain.stair
+            self.tmap[staircase.r * self.width + staircase.c] = self.Terrain.stair.value
             return True
         else:
             return False
@@ -135,9 +197,9 @@ class Dungeon:
         for r in range(self.height):
             for c in range(self.width):
                 if r == 0 or c == 0 or r == self.height - 1 or c == self.width - 1:
-                    self.rmap[r][c] = max_rock_hardness
+                    self.rmap[r * self.width + c] = max_rock_hardness
                 else:
-                    self.rmap[r][c] = random.randint(1, 254)
+                    self.rmap[r * self.width + c] = random.randint(1, 254)
 
         # There was originally more to this to allow it to be more 'smooth', but that resulted in boring corridors.
 
@@ -198,9 +260,10 @@ class Dungeon:
                 # Reached destination; trace back path
                 p = curr
                 while p and (p.r != r1 or p.c != c1):
-                    if self.tmap[p.r][p.c] == self.Terrain.debug:
-                        self.tmap[p.r][p.c] = self.Terrain.floor
-                        self.rmap[p.r][p.c] = 0
+                    idx = p.r * self.width + p.c
+                    if self.tmap[idx] == self.Terrain.debug.value:
+                        self.tmap[idx] = self.Terrain.floor.value
+                        self.rmap[idx] = 0
                     p = p.prev
                 return
 
@@ -211,7 +274,7 @@ class Dungeon:
                 if not self.valid_point(nr, nc) or (nr, nc) in visited:
                     continue
 
-                cost = self.rmap[nr][nc] + 1
+                cost = self.rmap[nr * self.width + nc] + 1
                 new_dist = curr.w + cost
                 neighbor = pmap.get((nr, nc))
 
@@ -306,122 +369,194 @@ class Dungeon:
         # Fill in remaining terrain as rock
         for r in range(self.height):
             for c in range(self.width):
+                idx = r * self.width + c
                 if self.valid_point(r, c):
-                    if self.tmap[r][c] == self.Terrain.debug:
-                        self.tmap[r][c] = self.Terrain.stdrock
+                    if self.tmap[idx] == self.Terrain.debug.value:
+                        self.tmap[idx] = self.Terrain.stdrock.value
                 else:
-                    self.tmap[r][c] = self.Terrain.immrock
-
-    # Calculates distance from point via walking using Dijkstra's algorithm.
-    def _calc_walk_distmap(self, r, c):
-        pq = PriorityQueue()
-        visited = set()
-        pmap = {}
-
-        # Initialize starting point
-        start = self.Dpoint(r, c, 0)
-        self.walk_distmap[r][c] = 0
-        pq.push(start, 0)
-        pmap[(r, c)] = start
-
-        # All 8 surrounding points, including diagonal
-        delta_r = [-1, -1, -1, 0, 0, 1, 1, 1]
-        delta_c = [-1, 0, 1, -1, 1, -1, 0, 1]
-
-        # Repeatedly pop points until queue is empty
-        while len(pq) > 0:
-            _, curr = pq.pop()
-
-            # Check if point has already been visited; ignore if so
-            if ((curr.r, curr.c) in visited) or self.rmap[curr.r][curr.c] != 0:
-                continue
-            visited.add((curr.r, curr.c))
-
-            # Itterate through surrounding points of curr
-            for dr, dc in zip(delta_r, delta_c):
-                nr, nc = curr.r + dr, curr.c + dc
-                # Check that point is valid and unvisited; otherwise ignore
-                if (
-                    not self.valid_point(nr, nc)
-                    or (nr, nc) in visited
-                    or self.rmap[nr][nc] != 0
-                ):
+                    self.tmap[idx] = self.Terrain.immrock.value
+
+    # Lowers walking distances outward from src, which must already hold its new distance.
+    # Every step costs 1, so a plain breadth-first search gives the same distances as Dijkstra's algorithm.
+    def _relax_walk_distmap(self, dmap, src):
+        rmap = self.rmap
+        dist = dmap.dist
+        queue = deque((src,))
+
+        # Only open floor (hardness 0) can be walked on. The outer border is always max hardness,
+        # so neighbor indices never need a separate bounds check.
+        while queue:
+            curr = queue.popleft()
+            new_dist = dist[curr] + 1
+            for delta in self._delta_idx:
+                nbr = curr + delta
+                if new_dist < dist[nbr] and rmap[nbr] == 0:
+                    dist[nbr] = new_dist
+                    queue.append(nbr)
+
+    # Lowers tunneling distances outward from src, which must already hold its new distance.
+    # Step costs are small integers (see _tunnel_step_cost), so this is Dijkstra's algorithm using a
+    # bucket queue (Dial's algorithm): one bucket per distance, reused in a ring.
+    def _relax_tunn_distmap(self, dmap, src):
+        rmap = self.rmap
+        dist = dmap.dist
+        step_cost = dmap.step_cost
+        ring_size = _max_tunnel_step + 1
+        buckets = [[] for _ in range(ring_size)]
+        curr_dist = dist[src]
+        buckets[curr_dist % ring_size].append(src)
+        queued = 1
+
+        while queued > 0:
+            bucket = buckets[curr_dist % ring_size]
+            while bucket:
+                curr = bucket.pop()
+                queued -= 1
+                if dist[curr] != curr_dist:
+                    # Stale entry; point was reached more cheaply after being queued
                     continue
-
-                new_dist = curr.w + 1
-                neighbor = pmap.get((nr, nc))
-
-                # Evaluate neighbor point
-                if neighbor is None:
-                    # Ungenerated in pmap, so creating and pushing to queue
-                    neighbor = self.Dpoint(nr, nc, new_dist)
-                    neighbor.prev = curr
-                    pmap[(nr, nc)] = neighbor
-                    self.walk_distmap[nr][nc] = new_dist
-                    pq.push(neighbor, new_dist)
-                elif new_dist < neighbor.w:
-                    # Neighbor weight is better through curr, so update and decrease key
-                    neighbor.w = new_dist
-                    self.walk_distmap[nr][nc] = new_dist
-                    neighbor.prev = curr
-                    pq.decrease_key(neighbor, new_dist)
-
-    # Calculates distance from point via any movement using Dijkstra's algorithm.
-    def _calc_tunn_distmap(self, r, c):
-        pq = PriorityQueue()
-        visited = set()
-        pmap = {}
-
-        # Initialize starting point
-        start = self.Dpoint(r, c, 0)
-        self.tunn_distmap[r][c] = 0
-        pq.push(start, 0)
-        pmap[(r, c)] = start
-
-        # All 8 surrounding points, including diagonal
-        delta_r = [-1, -1, -1, 0, 0, 1, 1, 1]
-        delta_c = [-1, 0, 1, -1, 1, -1, 0, 1]
-
-        # Repeatedly pop points until queue is empty
-        while len(pq) > 0:
-            _, curr = pq.pop()
-
-            # Check if point has already been visited; ignore if so
-            if (curr.r, curr.c) in visited:
+                for delta in self._delta_idx:
+                    nbr = curr + delta
+                    step = step_cost[rmap[nbr]]
+                    if step and curr_dist + step < dist[nbr]:
+                        dist[nbr] = curr_dist + step
+                        buckets[dist[nbr] % ring_size].append(nbr)
+                        queued += 1
+            curr_dist += 1
+
+    # Lowers distances outward from src, using whichever search suits the map's step costs.
+    def _relax_distmap(self, dmap, src):
+        if dmap.unit_steps:
+            self._relax_walk_distmap(dmap, src)
+        else:
+            self._relax_tunn_distmap(dmap, src)
+
+    # Gives a distance map its own copy of its array if a snapshot of the current one was handed out.
+    # Must be done before changing the array in place.
+    def _unshare_distmap(self, dmap):
+        if dmap.snapshot is not None:
+            dmap.dist = array("i", dmap.dist)
+            dmap.snapshot = None
+
+    # Calculates a distance map from scratch, with the origin at r, c.
+    def _calc_distmap(self, dmap, r, c):
+        src = r * self.width + c
+        # Always a new array, so any snapshot of the old one is left alone
+        dmap.dist = array("i", [dist_unreached]) * (self.height * self.width)
+        dmap.snapshot = None
+        dmap.offset = 0
+        dmap.dist[src] = 0
+        if dmap.step_cost[self.rmap[src]]:
+            self._relax_distmap(dmap, src)
+
+    # Lowers distances outward from cells that became cheaper to move into, leaving the rest of the map alone.
+    # The map must have been correct before those cells changed, and none of them may have become more expensive.
+    def _repair_distmap(self, dmap):
+        self._unshare_distmap(dmap)
+        rmap = self.rmap
+        dist = dmap.dist
+        step_cost = dmap.step_cost
+        heap = []
+
+        # Changed cells may now be reached more cheaply through one of their surrounding points
+        for idx in dmap.changed_cells:
+            step = step_cost[rmap[idx]]
+            if not step:
                 continue
-            visited.add((curr.r, curr.c))
-
-            # Itterate through surrounding points of curr
-            for dr, dc in zip(delta_r, delta_c):
-                nr, nc = curr.r + dr, curr.c + dc
-                # Check that point is valid and unvisited; otherwise ignore
-                if not self.valid_point(nr, nc) or (nr, nc) in visited:
-                    continue
+            best = dist[idx]
+            for delta in self._delta_idx:
+                nbr_dist = dist[idx + delta]
+                if nbr_dist != dist_unreached and nbr_dist + step < best:
+                    best = nbr_dist + step
+            if best < dist[idx]:
+                dist[idx] = best
+                heapq.heappush(heap, (best, idx))
+
+        # Spread the improvements; changed cells can start at any distance, so use a heap rather than buckets
+        while heap:
+            curr_dist, curr = heapq.heappop(heap)
+            if dist[curr] != curr_dist:
+                # Stale entry; point was reached more cheaply after being queued
+                continue
+            for delta in self._delta_idx:
+                nbr = curr + delta
+                step = step_cost[rmap[nbr]]
+                if step and curr_dist + step < dist[nbr]:
+                    dist[nbr] = curr_dist + step
+                    heapq.heappush(heap, (dist[nbr], nbr))
+
+    # Repairs a distance map for a new origin at r, c instead of recalculating it.
+    # Returns False (leaving the map untouched) if a repair isn't possible.
+    def _move_distmap_origin(self, dmap, r, c) -> bool:
+        src_r, src_c = dmap.src
+        old_src = src_r * self.width + src_c
+        src = r * self.width + c
+        dist = dmap.dist
+
+        # Both origins need to be floor, and the new origin reachable from the old one.
+        # After a long move (e.g. a teleport) nearly every cell gets closer, and recalculating is cheaper.
+        if (
+            max(abs(r - src_r), abs(c - src_c)) > _max_origin_repair_move
+            or self.rmap[old_src] != 0
+            or self.rmap[src] != 0
+            or dist[src] == dist_unreached
+        ):
+            return False
 
-                # 85 will be the amount that a tunneling monster can 'drill' per turn; i.e., the amount it can reduce hardness
-                new_dist = curr.w + (self.rmap[nr][nc] // 85) + 1
-                neighbor = pmap.get((nr, nc))
+        self._unshare_distmap(dmap)
+        dist = dmap.dist
+        # Moving between two floor cells costs the same in either direction, so a point's new distance is
+        # at most the old distance to the new origin plus its old distance. Raising the offset by that amount
+        # puts the bound on every cell at once; after that, only the cells that are actually closer to the
+        # new origin need to be lowered. Cells behind the move are left alone.
+        dmap.offset += dist[src] + dmap.offset
+        dist[src] = -dmap.offset
+        self._relax_distmap(dmap, src)
+        return True
 
-                # Evaluate neighbor point
-                if neighbor is None:
-                    # Ungenerated in pmap, so creating and pushing to queue
-                    neighbor = self.Dpoint(nr, nc, new_dist)
-                    neighbor.prev = curr
-                    pmap[(nr, nc)] = neighbor
-                    self.tunn_distmap[nr][nc] = new_dist
-                    pq.push(neighbor, new_dist)
-                elif new_dist < neighbor.w:
-                    # Neighbor weight is better through curr, so update and decrease key
-                    neighbor.w = new_dist
-                    self.tunn_distmap[nr][nc] = new_dist
-                    neighbor.prev = curr
-                    pq.decrease_key(neighbor, new_dist)
+    # Brings a distance map up to date with the current origin and terrain, doing as little work as possible.
+    def _update_distmap(self, dmap):
+        target = self.dist_origin
+        if target is not None:
+            if dmap.src is None or dmap.need_recalc:
+                self._calc_distmap(dmap, *target)
+            else:
+                if dmap.changed_cells:
+                    self._repair_distmap(dmap)
+                if dmap.src != target and not self._move_distmap_origin(dmap, *target):
+                    self._calc_distmap(dmap, *target)
+            dmap.src = target
+        dmap.flow = bytearray([_flow_unknown]) * (self.height * self.width)
+        dmap.changed_cells.clear()
+        dmap.need_recalc = False
+        dmap.stamp = self.dist_stamp
+
+    # Brings a distance map up to date and returns a read-only snapshot of it
+    def _snapshot_distmap(self, dmap) -> memoryview:
+        if dmap.stamp != self.dist_stamp:
+            self._update_distmap(dmap)
+        if dmap.snapshot is None:
+            dmap.snapshot = memoryview(dmap.dist).toreadonly()
+        return dmap.snapshot
+
+    # Records a rock / terrain change at a cell, so the distance maps can be repaired around it.
+    def _track_terrain_change(self, row: int, col: int, got_harder: bool):
+        self.terrain_version += 1
+        self.dist_stamp += 1
+        for dmap in (self.walk_distmap, self.tunn_distmap):
+            if dmap.src is None:
+                # Never calculated; nothing to repair
+                continue
+            if got_harder or not self.valid_point(row, col):
+                dmap.need_recalc = True
+            else:
+                dmap.changed_cells.add(row * self.width + col)
 
     # Method to show terrain in console
     def print_terrain(self):
         for r in range(self.height):
             for c in range(self.width):
-                t_type = self.tmap[r][c]
+                t_type = self._terrain_by_code[self.tmap[r * self.width + c]]
                 if t_type == self.Terrain.floor:
                     print(".", end="")
                 elif t_type == self.Terrain.stair:
@@ -439,12 +574,13 @@ class Dungeon:
     def print_rockmap(self):
         for r in range(self.height):
             for c in range(self.width):
-                if self.rmap[r][c] == 0:
+                idx = r * self.width + c
+                if self.rmap[idx] == 0:
                     print(" ", end="")
-                elif self.rmap[r][c] == max_rock_hardness:
+                elif self.rmap[idx] == max_rock_hardness:
                     print("X", end="")
                 else:
-                    print(self.rmap[r][c] % 10, end="")
+                    print(self.rmap[idx] % 10, end="")
 
             print("")  # Newline for end of row
 
@@ -452,14 +588,16 @@ class Dungeon:
     def print_walk_distmap(self):
         for r in range(self.height):
             for c in range(self.width):
-                if self.walk_distmap[r][c] == 0:
+                idx = r * self.width + c
+                weight = self.get_walking_weight_at(r, c)
+                if weight == 0:
                     print("\033[94m@\033[0m", end="")
-                elif self.rmap[r][c] == max_rock_hardness:
+                elif self.rmap[idx] == max_rock_hardness:
                     print("X", end="")
-                elif self.walk_distmap[r][c] == float("inf"):
+                elif weight == dist_unreached:
                     print(" ", end="")
                 else:
-                    print(self.walk_distmap[r][c] % 10, end="")
+                    print(weight % 10, end="")
 
             print("")  # Newline for end of row
 
@@ -467,26 +605,32 @@ class Dungeon:
     def print_tunn_distmap(self):
         for r in range(self.height):
             for c in range(self.width):
-                if self.tunn_distmap[r][c] == 0:
+                idx = r * self.width + c
+                weight = self.get_tunneling_weight_at(r, c)
+                if weight == 0:
                     print("\033[94m@\033[0m", end="")
-                elif self.rmap[r][c] == max_rock_hardness:
+                elif self.rmap[idx] == max_rock_hardness:
                     print("X", end="")
-                elif self.tunn_distmap[r][c] == float("inf"):
+                elif weight == dist_unreached:
                     print(" ", end="")
                 else:
-                    print(self.tunn_distmap[r][c] % 10, end="")
+                    print(weight % 10, end="")
 
             print("")  # Newline for end of row
 
-    # Calculates the distance maps from specified point
+    # Sets the origin for the distance maps
     def calc_dist_maps(self, r, c):
         """
-        This calculates distance maps for walking and tunneling to a given row, column coordinate.
+        This sets the row, column coordinate that the walking and tunneling distance maps measure distance to.
         These distance maps are used for monster pathfinding, so that coordinate is intended to be the player's position.
+
+        The maps themselves are only calculated when something asks for them, and each is then repaired from
+        its previous state where possible; a level where no monster needs a map never pays for it.
         """
 
-        self._calc_walk_distmap(r, c)
-        self._calc_tunn_distmap(r, c)
+        if self.dist_origin != (r, c):
+            self.dist_origin = (r, c)
+            self.dist_stamp += 1
 
     # Generates a random dungeon
     def generate_dungeon(self):
@@ -495,6 +639,9 @@ class Dungeon:
         """
         self._generate_rockmap()
         self._generate_terrain()
+        # Terrain was changed without tracking; the sight map is made again from the new terrain
+        self.sight_map = None
+        self.sight_version += 1
         return
 
     # grabs dungeon width
@@ -518,32 +665,106 @@ class Dungeon:
 
     # Grabs rock hardness at a specific location.
     def get_rock_at(self, row: int, col: int) -> int:
-        return self.rmap[row][col]
+        return self.rmap[row * self.width + col]
     
+    # Sets rock hardness at a specific location; the distance maps are repaired around it when next used.
     def set_rock_at(self, row: int, col: int, val: int):
-        self.rmap[row][col] = val
+        got_harder = val > self.rmap[row * self.width + col]
+        self.rmap[row * self.width + col] = val
+        self._track_terrain_change(row, col, got_harder)
     
     # Grabs terrain at a specific location.
     def get_terrain_at(self, row: int, col: int) -> Terrain:
-        return self.tmap[row][col]
+        return self._terrain_by_code[self.tmap[row * self.width + col]]
 
     # Makes specified location floor.
     def make_floor_at(self, row: int, col: int):
-        self.tmap[row][col] = self.Terrain.floor
-        self.rmap[row][col] = 0
+        self.tmap[row * self.width + col] = self.Terrain.floor.value
+        self.rmap[row * self.width + col] = 0
+        if self.sight_map is not None:
+            self.sight_map[row * self.width + col] = 0
+        self.sight_version += 1
+        self._track_terrain_change(row, col, False)
+        self.mark_dirty(row, col)
+
+    # Grabs the sight map; a flat grid indexed like the terrain map, 1 for cells that block sight and 0 otherwise.
+    def get_sight_map(self) -> bytearray:
+        if self.sight_map is None:
+            self.sight_map = self.tmap.translate(_terrain_blocks_sight)
+        return self.sight_map
+
+    # Marks a location as needing to be redrawn.
+    def mark_dirty(self, row: int, col: int):
+        self.dirty_cells.add(row * self.width + col)
+
+    # Grabs the set of locations (flat indices) marked as needing to be redrawn, and starts a new one.
+    def take_dirty_cells(self) -> set:
+        dirty_cells = self.dirty_cells
+        self.dirty_cells = set()
+        return dirty_cells
     
-    # Grabs walking distance map, in it's entirety.
-    def get_walking_distmap(self) -> list:
-        return self.walk_distmap
-
-    # Grabs a walking distance map weight at a given location.
+    # Grabs walking distance map, in it's entirety. Flat array indexed by row * width + col.
+    # Weights in the array are offset; compare them to each other, or use get_walking_weight_at for the distance.
+    def get_walking_distmap(self) -> array:
+        if self.walk_distmap.stamp != self.dist_stamp:
+            self._update_distmap(self.walk_distmap)
+        return self.walk_distmap.dist
+
+    # Grabs a read-only snapshot of the walking distance map, indexed and weighted the same as get_walking_distmap.
+    # Unlike that map, a snapshot never changes, so it can be kept as a memory of where the player was.
+    # Snapshots of the same map are shared; the dungeon copies the map before its next change instead.
+    def get_walking_snapshot(self) -> memoryview:
+        return self._snapshot_distmap(self.walk_distmap)
+
+    # Grabs a walking distance map weight at a given location; dist_unreached if it can't be walked to.
     def get_walking_weight_at(self, row: int, col: int) -> int:
-        return self.walk_distmap[row][col]
+        weight = self.get_walking_distmap()[row * self.width + col]
+        return weight if weight == dist_unreached else weight + self.walk_distmap.offset
     
-    # Grabs tunneling distance map, in it's entirety.
-    def get_tunneling_distmap(self)-> list:
-        return self.tunn_distmap
+    # Grabs tunneling distance map, in it's entirety. Flat array indexed by row * width + col.
+    # Weights in the array are offset; compare them to each other, or use get_tunneling_weight_at for the distance.
+    def get_tunneling_distmap(self)-> array:
+        if self.tunn_distmap.stamp != self.dist_stamp:
+            self._update_distmap(self.tunn_distmap)
+        return self.tunn_distmap.dist
     
+    # Grabs a read-only snapshot of the tunneling distance map; see get_walking_snapshot.
+    def get_tunneling_snapshot(self) -> memoryview:
+        return self._snapshot_distmap(self.tunn_distmap)
+
+    # Grabs the flow field for the walking distance map returned by get_walking_distmap / get_walking_snapshot.
+    # Pass both to get_flow_at to find where to step.
+    def get_walking_flow(self) -> bytearray:
+        if self.walk_distmap.stamp != self.dist_stamp:
+            self._update_distmap(self.walk_distmap)
+        return self.walk_distmap.flow
+
+    # Grabs the flow field for the tunneling distance map; see get_walking_flow.
+    def get_tunneling_flow(self) -> bytearray:
+        if self.tunn_distmap.stamp != self.dist_stamp:
+            self._update_distmap(self.tunn_distmap)
+        return self.tunn_distmap.flow
+
+    # Grabs the direction of the cheapest step from row, col on a distance map, using its flow field.
+    # The direction indexes the 8 surrounding cells row by row from the top left (the same order as actor.Move),
+    # or is 8 if no surrounding cell can be reached. Ties go to the first cell in that order.
+    # Each cell is only looked up once per flow field; after that it's a single read.
+    def get_flow_at(self, dist, flow, row: int, col: int) -> int:
+        idx = row * self.width + col
+        step = flow[idx]
+        if step == _flow_unknown:
+            step = 8
+            min_cost = dist_unreached
+            # Monsters are never on the border, so all 8 surrounding cells are in bounds
+            for pt_idx, delta in enumerate(self._delta_idx):
+                cost = dist[idx + delta]
+                if cost < min_cost:
+                    min_cost = cost
+                    step = pt_idx
+            flow[idx] = step
+        return step
+
     # Grabs a tunneling distance map weight at a given location.
     def get_tunneling_weight_at(self, row: int, col: int) -> int:
-        return self.tunn_distmap[row][col]
\ No newline at end of file
+        weight = self.get_tunneling_distmap()[row * self.width + col]
+        return weight if weight == dist_unreached else weight + self.tunn_distmap.offset
\ No newline at end of file
@@ -0,0 +1,532 @@
+import time
+from .utility import *
+from .actor import *
+from .dungeon import *
+
+
+# This file handles the game itself; the dungeon, its monsters and items, the turnloop, and the player's commands.
+# It has no UI of its own, so that it can be run without a display (benchmarks, simulations);
+# Pyrogue_Game is the tkinter front-end that displays it and turns keyboard input into player commands.
+
+# Pre-defined dungeon sizes (height, width), as offered by the main menu
+dungeon_size_setting = {
+    0: (15, 30),
+    1: (20, 40),
+    2: (25, 50),
+    3: (30, 60),
+    4: (35, 70),
+    5: (40, 80),
+}
+
+# Pre-defined difficulty settings, as offered by the main menu
+difficulty_setting = {0: 0.05, 1: 0.1, 2: 0.25, 3: 0.5, 4: 0.75, 5: 1.00}
+
+
+# The Pyrogue_Engine class handles all the high-level game logic, independent of how the game is displayed.
+class Pyrogue_Engine:
+
+    # Something that happened in the game, reported to the front-end; see take_events.
+    class Event:
+        def __init__(self, event_type: int, message: str = "", color: str = "cyan"):
+            self.type = event_type
+            self.message = message  # Text for message events
+            self.color = color  # Font color for message events
+
+    # Kinds of events
+    event_types = {
+        "message": 0,  # A message for the player; an empty message clears the last one
+        "new_level": 1,  # The player took a staircase; the dungeon, monsters and items were replaced
+        "game_over": 2,  # The player or a boss was killed
+    }
+
+    # Pyrogue_Engine constructor.
+    def __init__(
+        self,
+        mapsize_h: int,
+        mapsize_w: int,
+        difficulty: float,
+        monster_type_list: list,
+        item_type_list: list,
+    ):
+        # Init internal idea of dungeon size
+        self.mapsize_h = mapsize_h
+        self.mapsize_w = mapsize_w
+
+        # Game difficulty; applies to monster spawn rates
+        self.difficulty = difficulty
+
+        # Init dungeon and player fields
+        self.dungeon = None
+        self.player = None
+        self.player_score = 0
+
+        # Init lists for monsters as well as the map storing all actor locations
+        self.monster_type_list = monster_type_list
+        self.item_type_list = item_type_list
+        self.monster_list = []
+        self.item_list = []
+        self.actor_map = []
+        self.item_map = []
+        self.turn_pq = None
+
+        # Events that have not been taken by the front-end yet
+        self.events = []
+
+        # To store important game msgs; combat, new dungeon, game start, etc
+        self.msg_log = ["GAME START"]
+
+        # Misc game control fields
+        self.awaiting_player = True  # The turnloop is paused until the player ends their turn; the player goes first
+        self.selfdeath = False  # to check for suicide gameover message
+        self.game_over = False  # Indicate game over
+
+        # Initialize dungeon, item, & monster generation
+        self._init_generated_game()
+
+        # Start the turnloop for the game
+        self._start_turnloop()
+
+    # Nerfs speed value so that it doesn't become too overpowered.
+    def _speed_nerf(self, base_speed: int) -> int:
+        # speed is a legacy mechanic, where the intention was that it levels the playing field for the player.
+        # In practice, the value grows way faster than is practical, and it turns overpowered very fast.
+        # It still exists, but this is here to nerf it down so that it doesn't break the game.
+        return min(base_speed, 50)
+
+    # Reports an event to the front-end.
+    def _post_event(self, event_type: str, message: str = "", color: str = "cyan"):
+        self.events.append(Pyrogue_Engine.Event(self.event_types[event_type], message, color))
+
+    # Reports a message to the front-end; logged messages are also kept in the message log.
+    def _post_message(self, message: str, color: str = "cyan", log: bool = False):
+        self._post_event("message", message, color)
+        if log:
+            self.msg_log.append(message)
+
+    # Returns the events that happened since the last call, oldest first.
+    def take_events(self) -> list:
+        events = self.events
+        self.events = []
+        return events
+
+    # Removes a killed actor from the actor map.
+    def _remove_killed(self, actor):
+        r, c = actor.get_pos()
+        self.actor_map[r][c] = None
+        self.dungeon.mark_dirty(r, c)
+
+    # Populates the actor_map with a dungeon size proportionate number of monsters.
+    def _generate_monsters(self):
+        attemptc = 0
+        monsterc = 0
+        size_modifier = self.mapsize_w * self.mapsize_h
+        attempt_limit = int(self.difficulty * size_modifier)
+        min_monsterc = max(1, int(size_modifier // 100 * self.difficulty))
+        # Adjust exp_chancetime's decay curve to increase additional monster probability with difficulty
+        decay_rate = 0.95 / (self.difficulty + 0.5)
+
+        # Generate monsters; runs until minimum number and attempt limit are met
+        while (monsterc < min_monsterc) or (attemptc < attempt_limit):
+            # Grab a monster type definition
+            mtypedef = self.monster_type_list[
+                random.randint(0, len(self.monster_type_list) - 1)
+            ]
+            if (
+                mtypedef.is_gen_eligible()
+                and random.randint(1, 101) >= mtypedef.get_rarity()
+            ):
+                # Create monster
+                new_monster = Monster(mtypedef)
+                if monsterc <= min_monsterc or exp_chancetime(
+                    monsterc - min_monsterc, decay_rate
+                ):
+                    if new_monster.init_pos(
+                        self.dungeon,
+                        self.actor_map,
+                        random.randint(1, self.mapsize_h - 2),
+                        random.randint(1, self.mapsize_w - 2),
+                    ):
+                        # Update gen eligibility of monster type; Newly generated monster True, force reset False
+                        new_monster.update_gen_eligible(True, False)
+                        monsterc += 1
+                        self.monster_list.append(new_monster)
+            attemptc += 1
+        print(
+            "MONSTERS:",
+            min_monsterc,
+            "Min monsters,",
+            attemptc,
+            "Placement attempts,",
+            monsterc,
+            "Placed",
+        )
+
+    # Populates the item_map with a dungeon size proportionate number of items.
+    def _generate_items(self):
+        attemptc = 0
+        itemc = 0
+        size_modifier = self.mapsize_w * self.mapsize_h
+        attempt_limit = size_modifier
+        min_itemc = max(1, int(size_modifier // 50))
+        decay_rate = 0.75
+
+        # Generate items; runs until minimum number and attempt limit are met
+        while (itemc < min_itemc) or (attemptc < attempt_limit):
+            # Grab a item type definition
+            itypedef = self.item_type_list[
+                random.randint(0, len(self.item_type_list) - 1)
+            ]
+            if (
+                itypedef.is_gen_eligible()
+                and random.randint(1, 101) >= itypedef.get_rarity()
+            ):
+                # Create Item
+                new_item = Item(itypedef)
+                if itemc <= min_itemc or exp_chancetime(itemc - min_itemc, decay_rate):
+                    if new_item.init_pos(
+                        self.dungeon,
+                        self.item_map,
+                        random.randint(1, self.mapsize_h - 2),
+                        random.randint(1, self.mapsize_w - 2),
+                    ):
+                        # Update gen eligibility of monster type; Newly generated monster True, force reset False
+                        new_item.update_gen_eligible(True, False)
+                        itemc += 1
+                        self.item_list.append(new_item)
+            attemptc += 1
+        print(
+            "ITEMS:",
+            min_itemc,
+            "Min items,",
+            attemptc,
+            "Placement attempts,",
+            itemc,
+            "Placed",
+        )
+
+    # Resets the generation eligibility for item/monster type definitions.
+    # force_reset is for when the game is exited; every type becomes eligible again.
+    def reset_gen_eligibility(self, force_reset: bool):
+        # Reset monster generation eligibility
+        # Note that unique monsters only reset if they were not killed or if the game is over
+        for monster in self.monster_list:
+            # If game exit, force full reset. Otherwise depends on uniqueness and alive/dead
+            monster.update_gen_eligible(False, force_reset)
+
+        for item in self.item_list:
+            # If game exit, force full reset. Otherwise depends on uniqueness and used/unused
+            item.update_gen_eligible(False, force_reset)
+
+    # Initializes a new dungeon for the game to use; this also re-generates the monsters and restarts the turnloop.
+    def _replace_dungeon(self):
+
+        # Reset monster generation eligibility
+        self.reset_gen_eligibility(False)
+
+        # Ramp difficulty by 35%
+        self.difficulty *= 1.35
+
+        print(f"GAME: New dungeon level with difficulty {self.difficulty}")
+
+        # Init the dungeon itself
+        self.dungeon = Dungeon(self.mapsize_h, self.mapsize_w)
+        self.dungeon.generate_dungeon()
+
+        # Clear actor map, monster list, and priority queue
+        self.actor_map = [[None] * self.mapsize_w for _ in range(self.mapsize_h)]
+        self.item_map = [[None] * self.mapsize_w for _ in range(self.mapsize_h)]
+        self.monster_list = []
+        self.item_list = []
+        self.turn_pq = PriorityQueue()
+
+        # Set the player's position in the dungeon
+        while not self.player.init_pos(
+            self.dungeon,
+            self.actor_map,
+            random.randint(1, self.mapsize_h - 2),
+            random.randint(1, self.mapsize_w - 2),
+        ):
+            continue
+
+        # Generate new monsters
+        self._generate_monsters()
+
+        # Generate new items
+        self._generate_items()
+
+        # Restart the turn loop
+        self._start_turnloop()
+
+    # Initializes the game with randomly generated dungeon and monsters
+    # Dungeon is size_h * size_w, difficulty modifies monster spawn rates.
+    def _init_generated_game(self):
+        # Init dungeon
+        self.dungeon = Dungeon(self.mapsize_h, self.mapsize_w)
+        self.dungeon.generate_dungeon()
+
+        # Init actor map and item map
+        self.actor_map = [[None] * self.mapsize_w for _ in range(self.mapsize_h)]
+        self.item_map = [[None] * self.mapsize_w for _ in range(self.mapsize_h)]
+
+        # Init player
+        self.player = Player()
+        while not self.player.init_pos(
+            self.dungeon,
+            self.actor_map,
+            random.randint(1, self.mapsize_h - 2),
+            random.randint(1, self.mapsize_w - 2),
+        ):
+            continue
+
+        # Generate monsters to populate the dungeon
+        self._generate_monsters()
+        # Generate items
+        self._generate_items()
+
+    # Starts the game's turnloop
+    def _start_turnloop(self):
+        self.turn_pq = PriorityQueue()
+        self.player.set_currturn(0)
+        self.turn_pq.push(self.player, 0)
+        for monster in self.monster_list:
+            monster.set_currturn(monster.get_speed())
+            # 9 to ensure that ALL monsters get a turn after player's first turn
+            self.turn_pq.push(monster, monster.get_currturn())
+        # print("GAME: Turnloop started")
+
+    # Ends the player's turn, requeueing them so that the turnloop can continue.
+    def end_player_turn(self):
+        new_turn = self.player.get_currturn() + (
+            1000 // self._speed_nerf(self.player.get_speed())
+        )
+        self.turn_pq.push(self.player, new_turn)
+        self.player.set_currturn(new_turn)
+        self.awaiting_player = False
+
+    # Ends the game; the player or a boss was killed.
+    def _game_over(self, message: str, color: str):
+        self._post_message(message, color, log=True)
+        print("=== GAME OVER ===")
+        self.game_over = True
+        self._post_event("game_over")
+
+    # Handles turns in the turnloop, until it is the player's turn or the game is over.
+    # Also stops after max_turns turns, or after the first turn to end past time.perf_counter() deadline, if given.
+    def run_turns(self, max_turns: int = None, deadline: float = None):
+        turnc = 0
+        while not self.awaiting_player and not self.game_over:
+            # Game over check
+            if not self.player.is_alive():
+                # You were defeated; game over
+                if self.selfdeath:
+                    message = "You went out on your own terms; Game Over"
+                else:
+                    message = "You have been defeated; Game Over"
+                self._game_over(message, "red")
+                return
+
+            # Level clear check
+            if len(self.turn_pq) < 2:
+                # Just the player is left; print level clear message
+                self._post_message("Level Clear", "gold")
+
+            # Pop actor; check if player turn
+            _, actor = self.turn_pq.pop()
+
+            if actor.is_alive():
+                if isinstance(actor, Player):
+                    # Await player input to call its turn handeler
+                    # Essentially 'pauses' the turnloop until a player command ends the player's turn
+                    self.awaiting_player = True
+                    return
+
+                # Call the monster's turn handler directly
+                success, targ_actor, dmg = actor.handle_turn(
+                    self.dungeon,
+                    self.actor_map,
+                    self.item_list,
+                    self.item_map,
+                    self.player,
+                    8,
+                )
+
+                # Re-queue monster
+                new_turn = actor.get_currturn() + (1000 // actor.get_speed())
+                actor.set_currturn(new_turn)
+                self.turn_pq.push(actor, new_turn)
+
+                if isinstance(targ_actor, Player) and dmg != 0:
+                    message = actor.get_name() + " dealt " + str(dmg) + " damage to you"
+                    self._post_message(message, log=True)
+            elif actor.is_boss():
+                # Killed a boss monster; Game ends
+                message = f"{actor.get_name()} (BOSS) defeated; Game Over"
+                print(message)
+                self._game_over(message, "gold")
+                return
+
+            turnc += 1
+            if max_turns is not None and turnc >= max_turns:
+                return
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+
+    # Player command; moves the player (or attacks whatever is in the way). Returns True if the player's turn is over.
+    def player_move(self, move: Move) -> bool:
+        success, targ_actor, dmg = self.player.handle_turn(
+            self.dungeon,
+            self.actor_map,
+            self.item_list,
+            self.item_map,
+            self.player,
+            move,
+        )
+        if success:
+            if targ_actor != None:
+                if targ_actor.is_alive():
+                    message = (
+                        "You dealt " + str(dmg) + " dmg to " + targ_actor.get_name()
+                    )
+                else:
+                    # Print kill message
+                    message = "You killed " + targ_actor.get_name()
+                    # Remove monster from map
+                    self._remove_killed(targ_actor)
+                    self.player_score += int(
+                        targ_actor.get_score_val() * self.difficulty
+                    )
+
+                self._post_message(message, log=True)
+            else:
+                # Just a plain successful move; reset message
+                self._post_message("")
+            return success
+        else:
+            self._post_message("You can't move there")
+            return False
+
+    # Player command; takes the staircase the player is standing on to a new level. Returns True if the player's turn is over.
+    def player_take_stairs(self) -> bool:
+        pc_r, pc_c = self.player.get_pos()
+        # Wanting to navigate staircase; check that staircase is present where player is standing
+        if self.dungeon.get_terrain_at(pc_r, pc_c) == Dungeon.Terrain.stair:
+            # replace the dungeon, re-generating monsters and restarting the turn loop
+            self._replace_dungeon()
+            self._post_event("new_level")
+            self._post_message("You escaped to a new level of the dungeon", "gold", log=True)
+            return True
+        else:
+            self._post_message("You can't escape from here; no staircase")
+            return False
+
+    # Player command; picks up the item the player is standing on. Doesn't end the player's turn.
+    def player_pickup(self):
+        r, c = self.player.get_pos()
+        success, item = self.player.pickup_item(self.dungeon, self.item_map, r, c)
+        if success:
+            self._post_message("You picked up " + item.get_name())
+        else:
+            self._post_message("You are unable to pick up item")
+
+    # Player command; drops the item in inventory slot idx where the player is standing. Returns True if the item was dropped.
+    def player_drop(self, idx: int) -> bool:
+        success, item = self.player.drop_item(
+            idx, self.dungeon, self.item_list, self.item_map
+        )
+        if success:
+            msg = f"You dropped {item.get_name()}"
+        elif item != None:
+            msg = f"Cannot drop item here"
+        else:
+            msg = f"No item to drop"
+        self._post_message(msg)
+        return success
+
+    # Updates the player's area of sight, without taking a turn; equipment can change how far the player sees.
+    def update_player_sight(self):
+        self.player.handle_turn(
+            self.dungeon,
+            self.actor_map,
+            self.item_list,
+            self.item_map,
+            self.player,
+            Move(Move.none),
+        )
+
+    # Player command (cheat); teleports the player to (r, c). Doesn't end the player's turn. Returns True on success.
+    def player_teleport(self, r: int, c: int) -> bool:
+        success, targ_actor = self.player.teleport(
+            self.dungeon,
+            self.actor_map,
+            self.item_list,
+            self.item_map,
+            r,
+            c,
+        )
+        if success:
+            # Check for murdered actor
+            if targ_actor != None:
+                message = f"You teleported, killing {targ_actor.get_name()}"
+                # Killing via teleport is super cheesy, so no points are awarded here.
+            else:
+                message = f"You successfully teleported"
+        else:
+            message = "You cannot teleport there"
+        self._post_message(message)
+        return success
+
+    # Player command; makes a ranged attack at (r, c). Returns True if the player's turn is over (an attack was made).
+    def player_ranged_attack(self, r: int, c: int) -> bool:
+        attack_success, targ_actor, dmg = self.player.ranged_attack(
+            self.dungeon,
+            self.actor_map,
+            self.item_list,
+            self.item_map,
+            r,
+            c,
+        )
+        if attack_success:
+            if targ_actor != None:
+                # Check if targeted self
+                if targ_actor == self.player:
+                    if targ_actor.is_alive():
+                        message = (
+                            "Your ranged attack dealt "
+                            + str(dmg)
+                            + " dmg to *YOURSELF*"
+                        )
+                    else:
+                        message = "You know that the point is to survive, right?"
+                        self.selfdeath = True
+                        self._remove_killed(targ_actor)
+                else:
+                    if targ_actor.is_alive():
+                        message = (
+                            "Your ranged attack dealt "
+                            + str(dmg)
+                            + " dmg to "
+                            + targ_actor.get_name()
+                        )
+                    else:
+                        # Print kill message
+                        message = "You killed " + targ_actor.get_name() + " at range"
+                        # Remove monster from map
+                        self._remove_killed(targ_actor)
+                        self.player_score += int(
+                            targ_actor.get_score_val() * self.difficulty
+                        )
+
+                self._post_message(message, log=True)
+
+            # End player's turn? Attack was made, so yes
+            return True
+        else:
+            # Attack was unsuccessful
+            # Two options: No ranged weapon or insufficient ammunition.
+            if self.player.get_equipped_by_key("ranged") != None:
+                # Player must have insufficient Ammunition
+                message = "You do not have enough ammo"
+            else:
+                message = "You do not have a ranged weapon equipped"
+            self._post_message(message)
+            return False
@@ -0,0 +1,295 @@
+from .dungeon import Dungeon
+
+# This file contains the player's field of view: which cells of the dungeon can be seen from a position.
+# It's recursive shadowcasting, done with an explicit stack instead of recursion.
+# It also contains the monsters' line of sight to the player, which is a straight (Bresenham) line instead;
+# the two don't always agree, as shadowcasting isn't symmetric with it.
+
+# Transformation for each octant, or part of the scan circle; (xx, xy, yx, yy).
+# These control how dx/dy are applied to reach other octants.
+octant_transforms = (
+    (1, 0, 0, 1),  # Octant 0: E
+    (0, 1, 1, 0),  # Octant 1: NE
+    (-1, 0, 0, 1),  # Octant 2: W
+    (0, -1, 1, 0),  # Octant 3: SE
+    (-1, 0, 0, -1),  # Octant 4: W2
+    (0, -1, -1, 0),  # Octant 5: SW
+    (1, 0, 0, -1),  # Octant 6: E2
+    (0, 1, -1, 0),  # Octant 7: NW
+)
+
+# Most field of view results kept for reuse, per field of view
+fov_cache_size = 128
+
+# Slope tables by view radius; see _get_slope_table.
+_slope_tables = {}
+
+# Line of sight values for a cell; unknown until it's asked for
+_los_unknown = 0
+_los_clear = 1
+_los_blocked = 2
+
+
+# Grabs the slope table for a view radius, making it the first time that radius is used.
+# Entry i (1 to radius) lists the cells of the i'th row out from the origin, in scan order, as
+# (dx, left slope, right slope, within radius); dy is -i for every cell of the row.
+def _get_slope_table(radius: int) -> list:
+    table = _slope_tables.get(radius)
+    if table is None:
+        table = [()]
+        for i in range(1, radius + 1):
+            dy = -i
+            table.append(
+                tuple(
+                    (dx, (dx - 0.5) / (dy + 0.5), (dx + 0.5) / (dy - 0.5), dx * dx + dy * dy <= radius * radius)
+                    for dx in range(-i, 1)
+                )
+            )
+        _slope_tables[radius] = table
+    return table
+
+
+class Field_Of_View:
+
+    # How what can be seen changed; cells are flat indices. See update and take_diff.
+    class Diff:
+        def __init__(self, entered, left, remembered):
+            self.entered = entered  # Cells that became visible
+            self.left = left  # Cells that stopped being visible
+            self.remembered = remembered  # Cells whose remembered terrain changed; filled in by whoever remembers it
+
+    # Field of view constructor; sized for a dungeon of the given height and width.
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        # Flat, row-major grid; 1 for cells currently visible. Walls are never visible, just remembered.
+        # Kept between updates; only the cells that stop being visible are cleared.
+        self.visible = bytearray(height * width)
+        # Flat indices of the cells visible as of the last update
+        self.visible_cells = []
+        # Flat indices of every cell lit by the last update (visible cells and the walls seen); may repeat.
+        self.lit_cells = []
+        # Changes since the diff was last taken; see take_diff
+        self.pending_diff = self.Diff(set(), set(), set())
+        # Recent results, (lit cells, visible cells), by (row, col, radius, sight map version); least recently used first
+        self.cache = {}
+        # Sight map version of the results in the cache
+        self.cache_version = None
+        # Counts of updates that did / didn't find their result in the cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # Checks if a cell was visible as of the last update.
+    def is_visible(self, row: int, col: int) -> bool:
+        return self.visible[row * self.width + col] == 1
+
+    # Grabs the changes to what can be seen since the last call, and starts collecting new ones.
+    # A cell that changed and then changed back (e.g. left view and came back) is left out.
+    def take_diff(self) -> Diff:
+        diff = self.pending_diff
+        self.pending_diff = self.Diff(set(), set(), set())
+        return diff
+
+    # Adds cells whose remembered terrain changed to the pending diff.
+    def add_remembered(self, cells):
+        self.pending_diff.remembered.update(cells)
+
+    # Recalculates what can be seen from the given position, out to the given radius.
+    def update(self, dungeon: Dungeon, row: int, col: int, radius: int) -> Diff:
+        """
+        Replaces the visible cells with those seen from (row, col), reusing a cached result when there is one.
+        The flat indices of every cell lit, walls included, are left in lit_cells.
+        Returns how this update changed what can be seen; it's also added to the pending diff (see take_diff).
+        """
+        visible = self.visible
+        # Cells visible before this update are marked 2 until they're seen again; any left at 2 are out of view.
+        was_visible = self.visible_cells
+        for idx in was_visible:
+            visible[idx] = 2
+
+        # Results from before the sight map last changed can't be used again
+        if self.cache_version != dungeon.sight_version:
+            self.cache.clear()
+            self.cache_version = dungeon.sight_version
+        key = (row, col, radius, dungeon.sight_version)
+        cached = self.cache.pop(key, None)
+        if cached is None:
+            self.cache_misses += 1
+            lit, now_visible, entered = self._cast_light(dungeon, row, col, radius)
+            if len(self.cache) >= fov_cache_size:
+                # Evict the least recently used result; the dict is kept in order of use
+                del self.cache[next(iter(self.cache))]
+            cached = (tuple(lit), tuple(now_visible))
+        else:
+            self.cache_hits += 1
+            lit, now_visible = cached
+            entered = []
+            for idx in now_visible:
+                if visible[idx] == 0:
+                    entered.append(idx)
+                visible[idx] = 1
+        # (Re)inserted as the most recently used result
+        self.cache[key] = cached
+
+        left = []
+        for idx in was_visible:
+            if visible[idx] == 2:
+                visible[idx] = 0
+                left.append(idx)
+        self.visible_cells = now_visible
+        self.lit_cells = lit
+
+        # Fold into the pending diff; a cell going back to how it was when the diff was last taken cancels out
+        pending = self.pending_diff
+        for idx in entered:
+            if idx in pending.left:
+                pending.left.remove(idx)
+            else:
+                pending.entered.add(idx)
+        for idx in left:
+            if idx in pending.entered:
+                pending.entered.remove(idx)
+            else:
+                pending.left.add(idx)
+        return self.Diff(entered, left, [])
+
+    # Shadowcasting; determines what can be seen from (row, col), marking the cells seen in the visibility buffer.
+    def _cast_light(self, dungeon: Dungeon, row: int, col: int, radius: int):
+        """
+        Casts light from (row, col) through the dungeon's sight map, one octant at a time.
+        Cells on the immutable border are never lit, and don't block light.
+        Returns the cells lit (walls included; may repeat), the cells now visible, and the visible cells that weren't
+        visible before (marked 0 in the buffer, rather than 1 or 2).
+        """
+        visible = self.visible
+        now_visible = []
+        entered = []
+
+        width = self.width
+        opaque = dungeon.get_sight_map()
+        table = _get_slope_table(radius)
+        # Bounds of the cells inside the immutable border
+        max_r = self.height - 1
+        max_c = width - 1
+
+        origin = row * width + col
+        if visible[origin] == 0:
+            entered.append(origin)
+        visible[origin] = 1
+        now_visible.append(origin)
+        lit = [origin]
+        add_lit = lit.append
+
+        for xx, xy, yx, yy in octant_transforms:
+            # Each entry is a scan yet to be done: (first row, start slope, end slope)
+            stack = [(1, 1.0, 0.0)]
+            while stack:
+                first, start_slope, end_slope = stack.pop()
+                # Skip the scan if its sector is invalid
+                if start_slope < end_slope:
+                    continue
+                for i in range(first, radius + 1):
+                    blocked = False
+                    new_start = start_slope
+                    # Map coordinates for dx = 0 in this row; dy is -i
+                    base_c = col - i * xy
+                    base_r = row - i * yy
+
+                    for dx, l_slope, r_slope, in_radius in table[i]:
+                        # Skip cell if outside of this field-of-view segment
+                        if r_slope > start_slope:
+                            continue
+                        elif l_slope < end_slope:
+                            break
+
+                        r = base_r + dx * yx
+                        c = base_c + dx * xx
+                        if 0 < r < max_r and 0 < c < max_c:
+                            idx = r * width + c
+                            is_wall = opaque[idx]
+
+                            if in_radius:
+                                add_lit(idx)
+                                if not is_wall and visible[idx] != 1:
+                                    if visible[idx] == 0:
+                                        entered.append(idx)
+                                    visible[idx] = 1
+                                    now_visible.append(idx)
+
+                            if blocked:
+                                if is_wall:
+                                    new_start = r_slope  # Wall continues
+                                else:
+                                    blocked = False
+                                    start_slope = new_start
+                            elif is_wall and i < radius:
+                                blocked = True
+                                # Scan the rows beyond, in the sector up to this wall
+                                stack.append((i + 1, start_slope, l_slope))
+                                new_start = r_slope
+                    if blocked:
+                        break
+
+        return lit, now_visible, entered
+
+
+class Line_Of_Sight:
+
+    # Line of sight constructor; sized for a dungeon of the given height and width.
+    def __init__(self, height: int, width: int):
+        self.width = width
+        # Flat, row-major grid; whether each cell has line of sight to the target, worked out as cells are asked about.
+        # Only good for one target position and rock map; see has_los.
+        self.known = bytearray(height * width)
+        # Flat indices of the cells known, to forget them when the target or rock changes
+        self.known_cells = []
+        # (Target flat index, dungeon terrain version) that the known cells are for
+        self.epoch = None
+
+    # Checks if there is a straight line, clear of rock, from (row, col) to (target_r, target_c).
+    def has_los(self, dungeon: Dungeon, row: int, col: int, target_r: int, target_c: int) -> bool:
+        """
+        Walks the Bresenham line from (row, col) to the target; any rock on it, either end included, blocks it.
+        Each cell is only walked from once while the target stays put and no rock changes.
+        """
+        width = self.width
+        target = target_r * width + target_c
+        epoch = (target, dungeon.terrain_version)
+        known = self.known
+        if epoch != self.epoch:
+            for idx in self.known_cells:
+                known[idx] = _los_unknown
+            self.known_cells = []
+            self.epoch = epoch
+
+        idx = row * width + col
+        if known[idx] == _los_unknown:
+            known[idx] = _los_clear if self._walk_line(dungeon.rmap, row, col, target_r, target_c) else _los_blocked
+            self.known_cells.append(idx)
+        return known[idx] == _los_clear
+
+    # Walks the Bresenham line from (row, col) to the target over the rock map, stopping at the first rock.
+    # Returns True if the line is clear of rock, either end included.
+    def _walk_line(self, rmap, row: int, col: int, target_r: int, target_c: int) -> bool:
+        width = self.width
+        diff_r = abs(target_r - row)
+        diff_c = abs(target_c - col)
+        step_dir_r = 0 if row == target_r else (1 if row < target_r else -1)
+        step_dir_c = 0 if col == target_c else (1 if col < target_c else -1)
+        error = diff_c - diff_r
+        # Steps are taken on the flat index
+        idx = row * width + col
+        target = target_r * width + target_c
+        step_r = step_dir_r * width
+        while True:
+            if rmap[idx]:
+                return False
+            if idx == target:
+                return True
+            e2 = 2 * error
+            if e2 > -diff_r:
+                error -= diff_r
+                idx += step_dir_c
+            if e2 < diff_c:
+                error += diff_c
+                idx += step_r
@@ -1,13 +1,16 @@
+import time
 import tkinter as tk
+import tkinter.font as tkfont
 from .utility import *
 from .actor import *
 from .dungeon import *
+from .engine import Pyrogue_Engine
 
 
-# This file handles the main gameloop and the tkinter UI for the game itself.
+# This file handles the tkinter UI for the game itself; the game is run by a Pyrogue_Engine (see engine.py).
 
 
-# The Pyrogue_Game class handles all the high-level game logic and control.
+# The Pyrogue_Game class displays a game, and turns keyboard input into commands for its engine.
 class Pyrogue_Game:
 
     # Pyrogue_Game constructor.
@@ -41,39 +44,20 @@ class Pyrogue_Game:
         self.scrsize_h = scrsize_h
         self.scrsize_w = scrsize_w
 
-        # Internal idea of size for UI elements; scales with screensize on render.
-        # number of char 'rows' in screen; one for each row in dungeon + 3 for messages / player info
-        self.scrn_rows = mapsize_h + 3
-        max_tile_width = scrsize_w // mapsize_w
-        max_tile_height = (
-            scrsize_h // self.scrn_rows
-        )  # Note that there are 3 extra rows for messages / player information
-        self.tile_size = min(max_tile_width, max_tile_height)
-        self.font_size = int(self.tile_size / 1.5)
-
-        # Init internal idea of dungeon size
-        self.mapsize_h = mapsize_h
-        self.mapsize_w = mapsize_w
-
-        # Game difficulty; applies to monster spawn rates
-        self.difficulty = difficulty
+        # Viewport; the part of the dungeon shown on screen, in tiles (including the outer ring, covered by the border).
+        # Dungeons that don't fit on screen with tiles of at least min_tile_size pixels scroll to follow the player.
+        self.min_tile_size = 12
+        self.cam_margin = 8  # Tiles kept between the player and the edge of the viewport, where the dungeon allows
+        self.cam_r = 0  # Dungeon (row, col) of the viewport's top left corner
+        self.cam_c = 0
 
-        # Init dungeon and player fields
-        self.dungeon = None
-        self.player = None
-        self.player_score = 0
-
-        # Init lists for monsters as well as the map storing all actor locations
-        self.monster_type_list = monster_type_list
-        self.item_type_list = item_type_list
-        self.monster_list = []
-        self.item_list = []
-        self.actor_map = []
-        self.item_map = []
-        self.turn_pq = None
+        # The game itself; generates the dungeon, monsters & items, and runs the turnloop
+        self.engine = Pyrogue_Engine(
+            mapsize_h, mapsize_w, difficulty, monster_type_list, item_type_list
+        )
 
-        # Initialize dungeon, item, & monster generation
-        self._init_generated_game()
+        # Internal idea of size for UI elements; scales with screensize on render.
+        self._fit_viewport(scrsize_h, scrsize_w)
 
         # Init the canvas to display dungeon / actors
         self.canvas = tk.Canvas(
@@ -92,8 +76,31 @@ class Pyrogue_Game:
         # Dungeon display modes; displays different aspects of the map.
         self.render_modes = {"standard": 0, "x-ray": 1, "walkmap": 2, "tunnmap": 3}
         self.curr_render_mode = self.render_modes["standard"]
-        # {(row, col): (char, color)}. Stores last updated render info.
+        # {(row, col): (char, color)}, by position in the viewport. Stores last updated render info.
         self.render_cache = {}
+        # Camera (row, col) when last rendered; every tile on screen needs checking once it scrolls
+        self.render_cam = None
+        # Dungeon that was last rendered; a new dungeon needs every tile checked
+        self.render_dungeon = None
+        # (row, col) of the targeting cursor when last rendered, or None; that tile needs redrawing once it moves
+        self.render_cursor = None
+        # Canvas text item ids for each tile on screen (flat, indexed by viewport row * view_w + col; None for the border).
+        # Created once per layout on a full rerender; tiles are then only updated with itemconfig.
+        self.tile_items = []
+        # Row-run rendering; draws each dungeon row as one text item per run of same-colored tiles instead.
+        self.row_run_render = False
+        self.row_items = []  # Canvas text item ids for the runs in each row
+        # Horizontal distance between tile columns in pixels; the glyph width of the font when rendering row runs
+        self.col_pitch = 0
+        # Render scheduling; requested renders are coalesced into at most max_fps frames per second
+        self.max_fps = 60
+        self.render_after_id = None  # Tkinter after() id of the scheduled frame, if there is one
+        self.last_render_time = 0.0
+        # Animation ticks; only scheduled while something on screen changes color over time
+        self.anim_interval = 200  # ms between animation frames
+        self.anim_after_id = None  # Tkinter after() id of the next animation tick, if there is one
+        self.anim_frame = 0  # Animation clock; advances once per tick, and picks the colors of animated tiles
+        self.render_anim_frame = -1  # Animation frame that was last rendered
 
         # Fields to handle submenus and their navigation
         self.submenu_canvas = None
@@ -157,26 +164,18 @@ class Pyrogue_Game:
         self.target_c = 0
         self.curr_input_mode = self.input_modes["player_turn"]
 
-        # To store important game msgs; combat, new dungeon, game start, etc
-        self.msg_log = ["GAME START"]
-
         # Misc game control fields
         self.turnloop_started = False
-        self.selfdeath = False  # to check for suicide gameover message
-        self.game_over = False  # Indicate game over
         self.game_exit = False  # Indicate that user intends to exit to main menu
 
+        # Turnloop control fields
+        self.batch_turns = True  # Handle all monster turns between player turns at once, rendering only once
+        self.turn_batch_budget = 0.05  # Longest time (seconds) a batch runs before letting tkinter handle events
+
         # Start the turnloop for the game
-        self._start_turnloop()
+        self._next_turn()
         print("=== GAME START ===")
 
-    # Nerfs speed value so that it doesn't become too overpowered.
-    def _speed_nerf(self, base_speed: int) -> int:
-        # speed is a legacy mechanic, where the intention was that it levels the playing field for the player.
-        # In practice, the value grows way faster than is practical, and it turns overpowered very fast.
-        # It still exists, but this is here to nerf it down so that it doesn't break the game.
-        return min(base_speed, 50)
-
     # Event handeler for screen resizing.
     def _on_win_resize(self, event):
         # Save the event for redrawing
@@ -203,11 +202,7 @@ class Pyrogue_Game:
                 # print("GAME: Player turn completed")
 
                 # Requeue player
-                new_turn = self.player.get_currturn() + (
-                    1000 // self._speed_nerf(self.player.get_speed())
-                )
-                self.turn_pq.push(self.player, new_turn)
-                self.player.set_currturn(new_turn)
+                self.engine.end_player_turn()
                 self.root.after(10, self._next_turn)
             # else:
             # Player turn was not concluded; turn continues
@@ -233,17 +228,13 @@ class Pyrogue_Game:
                 # print("GAME: Player turn completed")
 
                 # Requeue player
-                new_turn = self.player.get_currturn() + (
-                    1000 // self._speed_nerf(self.player.get_speed())
-                )
-                self.turn_pq.push(self.player, new_turn)
-                self.player.set_currturn(new_turn)
+                self.engine.end_player_turn()
                 self.root.after(10, self._next_turn)
         elif self.curr_input_mode == self.input_modes["inspect"]:
             # Inspection window input handler
             self._handle_inspect_input(key)
         # Any input after end of game returns control to main menu
-        if self.game_over and (key == "Return" or key == "Escape"):
+        if self.engine.game_over and (key == "Return" or key == "Escape"):
             self._end_game()
 
     # Handles input for player turn. Returns True on completion of turn, false if turn is still ongoing.
@@ -274,20 +265,10 @@ class Pyrogue_Game:
         if key not in move_delta:
             # Other input; Either navigating to a submenu or passing staircase
             if key == "greater" or key == "0":
-                pc_r, pc_c = self.player.get_pos()
-                # Wanting to navigate staircase; check that staircase is present where player is standing
-                if self.dungeon.get_terrain_at(pc_r, pc_c) == Dungeon.Terrain.stair:
-                    # replace the dungeon, re-generating monsters and restarting the turn loop
-                    self._replace_dungeon()
-                    pc_r, pc_c = self.player.get_pos()
-                    self._update_hud()
-                    message = "You escaped to a new level of the dungeon"
-                    self._update_top_label(message, "gold")
-                    self.msg_log.append(message)
-                    return True
-                else:
-                    message = "You can't escape from here; no staircase"
-                    self._update_top_label(message)
+                # Wanting to navigate staircase; only ends the turn if there is one where the player is standing
+                turn_completed = self.engine.player_take_stairs()
+                self._handle_engine_events()
+                return turn_completed
             elif key == "e":
                 # Enter the player equipment menu
                 self.curr_input_mode = self.input_modes["menu_equipment"]
@@ -295,6 +276,7 @@ class Pyrogue_Game:
                 self.need_submenu_rerender = True
                 self.submenu_select_idx = 0
                 self._render_equipment()
+                self._request_render()
                 self._update_top_label("PAUSED")
                 # print("GAME: Player equipment sub-menu activated")
                 return False  # Turn not over
@@ -309,7 +291,13 @@ class Pyrogue_Game:
                     self.curr_render_mode = self.render_modes["standard"]
                     # print("GAME: Returned to standard render mode")
                 self.need_full_rerender = True
-                self._render_frame(self.scrsize_h, self.scrsize_w)
+                self._request_render()
+                return False  # Turn not over
+            elif key == "v":
+                # Toggle row-run rendering; far fewer canvas items, for large dungeons / slow machines
+                self.row_run_render = not self.row_run_render
+                self.need_full_rerender = True
+                self._request_render()
                 return False  # Turn not over
             elif key == "i":
                 # Enter the player inventory menu
@@ -318,6 +306,7 @@ class Pyrogue_Game:
                 self.need_submenu_rerender = True
                 self.submenu_select_idx = 0
                 self._render_inventory()
+                self._request_render()
                 self._update_top_label("PAUSED")
                 # print("GAME: Player inventory sub-menu activated")
                 return False  # Turn not over
@@ -327,26 +316,23 @@ class Pyrogue_Game:
                 self.curr_submenu = self.display_submenus["menu_monster_list"]
                 self.need_submenu_rerender = True
                 self._render_monster_list()
+                self._request_render()
                 self._update_top_label("PAUSED")
                 # print("GAME: Monster list sub-menu activated")
                 return False  # Turn not over
             elif key == "p":
                 # Attempt to pickup item
-                r, c = self.player.get_pos()
-                success, item = self.player.pickup_item(
-                    self.dungeon, self.item_map, r, c
-                )
-                if success:
-                    text = "You picked up " + item.get_name()
-                else:
-                    text = "You are unable to pick up item"
-                self._update_top_label(text)
+                self.engine.player_pickup()
+                self._handle_engine_events()
+                self._request_render()
             elif key == "t":
                 # Enter targeting mode; This will allow the user to inspect items & monsters,
                 # teleport, and potentially (if I implement it) to use ranged weapons from a distance.
                 self.curr_input_mode = self.input_modes["targeting"]
-                self.target_r, self.target_c = self.player.get_pos()
+                self.target_r, self.target_c = self.engine.player.get_pos()
                 self._update_top_label("Targeting mode activated")
+                # Draw the targeting cursor
+                self._request_render()
             elif key == "z" and self.cheats_enabled:
                 # Rotate through distance map displays
                 if self.curr_render_mode == self.render_modes["standard"]:
@@ -356,18 +342,20 @@ class Pyrogue_Game:
                 elif self.curr_render_mode == self.render_modes["tunnmap"]:
                     self.curr_render_mode = self.render_modes["standard"]
                 self.need_full_rerender = True
-                self._render_frame(self.scrsize_h, self.scrsize_w)
+                self._request_render()
                 return False  # Turn not over
             elif key == "plus" and self.cheats_enabled:
-                self.player.force_max_health()
+                self.engine.player.force_max_health()
                 self._update_hud()
                 self._update_top_label("Restored hit points & ammunition", "gold")
+                self._request_render()
             elif key == "Escape":
                 # Enter the "exit" menu for exit options
                 self.curr_input_mode = self.input_modes["menu_exit"]
                 self.curr_submenu = self.display_submenus["menu_exit"]
                 self.submenu_select_idx = 0
                 self._render_exit_menu()
+                self._request_render()
                 self._update_top_label("PAUSED")
                 # print("GAME: Exit sub-menu activated")
                 return False  # Turn not over
@@ -376,41 +364,9 @@ class Pyrogue_Game:
                 return False
         else:
             # Regular valid move
-            move = move_delta[key]
-            success, targ_actor, dmg = self.player.handle_turn(
-                self.dungeon,
-                self.actor_map,
-                self.item_list,
-                self.item_map,
-                self.player,
-                move,
-            )
-            if success:
-                if targ_actor != None:
-                    if targ_actor.is_alive():
-                        message = (
-                            "You dealt " + str(dmg) + " dmg to " + targ_actor.get_name()
-                        )
-                    else:
-                        # Print kill message
-                        message = "You killed " + targ_actor.get_name()
-                        # Remove monster from map
-                        targ_r, targ_c = targ_actor.get_pos()
-                        self.actor_map[targ_r][targ_c] = None
-                        self.player_score += int(
-                            targ_actor.get_score_val() * self.difficulty
-                        )
-
-                    self._update_top_label(message)
-                    self.msg_log.append(message)
-                else:
-                    # Just a plain successful move; reset message
-                    self._update_top_label("")
-                return success
-            else:
-                message = "You can't move there"
-                self._update_top_label(message)
-                return False
+            turn_completed = self.engine.player_move(move_delta[key])
+            self._handle_engine_events()
+            return turn_completed
 
     # Handles input for exit submenu
     def _handle_exit_input(self, key):
@@ -421,6 +377,7 @@ class Pyrogue_Game:
                 self.curr_submenu = self.display_submenus["none"]
                 self.submenu_canvas.destroy()
                 self.need_full_rerender = True
+                self._request_render()
                 # print("GAME: Exit sub-menu closed")
                 self._update_top_label("")
             elif self.submenu_select_idx == 1:
@@ -436,6 +393,7 @@ class Pyrogue_Game:
                 self.submenu_select_idx = 0
             self.need_submenu_rerender = True
             self._render_exit_menu()
+            self._request_render()
         elif key == "k" or key == "Up" or key == "8":
             # Move selection up
             if self.submenu_select_idx >= 1:
@@ -444,12 +402,14 @@ class Pyrogue_Game:
                 self.submenu_select_idx = 2
             self.need_submenu_rerender = True
             self._render_exit_menu()
+            self._request_render()
         elif key == "Escape":
             self.curr_input_mode = self.input_modes["player_turn"]
             self.curr_submenu = self.display_submenus["none"]
             if self.submenu_canvas:
                 self.submenu_canvas.destroy()
             self.need_full_rerender = True
+            self._request_render()
             # print("GAME: Exit sub-menu closed")
             self._update_top_label("")
 
@@ -462,6 +422,7 @@ class Pyrogue_Game:
             if self.submenu_canvas:
                 self.submenu_canvas.destroy()
             self.need_full_rerender = True
+            self._request_render()
             # print("GAME: Monster list sub-menu closed")
             self._update_top_label("")
         elif key == "j" or key == "Down" or key == "2":
@@ -488,14 +449,8 @@ class Pyrogue_Game:
                 self.submenu_canvas.destroy()
             self.need_full_rerender = True
             # Forces Update to player's area of sight
-            self.player.handle_turn(
-                self.dungeon,
-                self.actor_map,
-                self.item_list,
-                self.item_map,
-                self.player,
-                Move(Move.none),
-            )
+            self.engine.update_player_sight()
+            self._request_render()
             # print("GAME: Player inventory sub-menu closed")
             self._update_top_label("")
         elif (
@@ -515,9 +470,10 @@ class Pyrogue_Game:
             # print("GAME: Player inventory sub-menu closed")
             # print("GAME: Player equipment sub-menu opened")
             self._render_equipment()
+            self._request_render()
         elif key == "Return":
             # Attempt to equip item
-            success, item = self.player.equip_use_item(self.submenu_select_idx)
+            success, item = self.engine.player.equip_use_item(self.submenu_select_idx)
             if success:
                 # Check for message phrasing
                 if (
@@ -529,11 +485,12 @@ class Pyrogue_Game:
                     self._update_top_label("You equipped " + item.get_name())
                 self.need_submenu_rerender = True
                 self._render_inventory()
+                self._request_render()
                 self._update_hud()
             else:
                 self._update_top_label("No item to equip")
         elif key == "i":
-            success, item = self.player.get_inventory_item(self.submenu_select_idx)
+            success, item = self.engine.player.get_inventory_item(self.submenu_select_idx)
             if success:
                 self.inspect_obj = item
                 self._update_top_label(f"Inspecting {self.inspect_obj.get_name()}")
@@ -541,44 +498,43 @@ class Pyrogue_Game:
                 self.curr_submenu = self.display_submenus["inspect_item"]
                 self.need_submenu_rerender = True
                 self._render_item_inspect(self.inspect_obj)
+                self._request_render()
             else:
                 self._update_top_label("No item to inspect")
         elif key == "j" or key == "Down" or key == "2":
             # Move selection down
-            if self.submenu_select_idx < self.player.get_inventory_size() - 1:
+            if self.submenu_select_idx < self.engine.player.get_inventory_size() - 1:
                 self.submenu_select_idx += 1
             else:
                 self.submenu_select_idx = 0
             self.need_submenu_rerender = True
             self._render_inventory()
+            self._request_render()
         elif key == "k" or key == "Up" or key == "8":
             # Move selection up
             if self.submenu_select_idx >= 1:
                 self.submenu_select_idx -= 1
             else:
-                self.submenu_select_idx = self.player.get_inventory_size() - 1
+                self.submenu_select_idx = self.engine.player.get_inventory_size() - 1
             self.need_submenu_rerender = True
             self._render_inventory()
+            self._request_render()
         elif key == "d":
-            success, item = self.player.drop_item(
-                self.submenu_select_idx, self.dungeon, self.item_list, self.item_map
-            )
+            success = self.engine.player_drop(self.submenu_select_idx)
+            self._handle_engine_events()
             if success:
-                msg = f"You dropped {item.get_name()}"
                 self.need_submenu_rerender = True
                 self._render_inventory()
-            elif item != None:
-                msg = f"Cannot drop item here"
-            else:
-                msg = f"No item to drop"
-            self._update_top_label(msg)
+                # The dropped item is drawn under the player
+                self._request_render()
         elif key == "x":
             # Attempt to destroy an item
-            success, item = self.player.expunge_item(self.submenu_select_idx)
+            success, item = self.engine.player.expunge_item(self.submenu_select_idx)
             if success:
                 self._update_top_label("You destroyed " + item.get_name())
                 self.need_submenu_rerender = True
                 self._render_inventory()
+                self._request_render()
             else:
                 self._update_top_label("No item to destroy")
 
@@ -592,14 +548,8 @@ class Pyrogue_Game:
                 self.submenu_canvas.destroy()
             self.need_full_rerender = True
             # Forces Update to player's area of sight
-            self.player.handle_turn(
-                self.dungeon,
-                self.actor_map,
-                self.item_list,
-                self.item_map,
-                self.player,
-                Move(Move.none),
-            )
+            self.engine.update_player_sight()
+            self._request_render()
             # print("GAME: Player equipment sub-menu closed")
             self._update_top_label("")
         elif (
@@ -619,6 +569,7 @@ class Pyrogue_Game:
             # print("GAME: Player equipment sub-menu closed")
             # print("GAME: Player iventory sub-menu opened")
             self._render_inventory()
+            self._request_render()
         elif key == "Return":
             key_str = {
                 0: "weapon",
@@ -630,13 +581,14 @@ class Pyrogue_Game:
                 6: "ring_r",
                 7: "light",
             }
-            success, inventory_problem, item = self.player.unequip_item(
+            success, inventory_problem, item = self.engine.player.unequip_item(
                 key_str[self.submenu_select_idx]
             )
             if success:
                 self._update_top_label(f"{item.get_name()} returned to inventory")
                 self.need_submenu_rerender = True
                 self._render_equipment()
+                self._request_render()
                 self._update_hud()
             elif inventory_problem:
                 self._update_top_label("No room in inventory to unequip item")
@@ -651,7 +603,7 @@ class Pyrogue_Game:
                 6: "ring_r",
                 7: "light",
             }
-            item = self.player.get_equipped_by_key(key_str[self.submenu_select_idx])
+            item = self.engine.player.get_equipped_by_key(key_str[self.submenu_select_idx])
             if item != None:
                 self.inspect_obj = item
                 self._update_top_label(f"Inspecting {self.inspect_obj.get_name()}")
@@ -659,6 +611,7 @@ class Pyrogue_Game:
                 self.curr_submenu = self.display_submenus["inspect_item"]
                 self.need_submenu_rerender = True
                 self._render_item_inspect(self.inspect_obj)
+                self._request_render()
             else:
                 self._update_top_label("No item to inspect")
 
@@ -670,6 +623,7 @@ class Pyrogue_Game:
                 self.submenu_select_idx = 0
             self.need_submenu_rerender = True
             self._render_equipment()
+            self._request_render()
         elif key == "k" or key == "Up" or key == "8":
             # Move selection up
             if self.submenu_select_idx >= 1:
@@ -678,6 +632,7 @@ class Pyrogue_Game:
                 self.submenu_select_idx = 7
             self.need_submenu_rerender = True
             self._render_equipment()
+            self._request_render()
 
     # Handles input for targeting mode
     def _handle_targeting_input(self, key):
@@ -718,40 +673,24 @@ class Pyrogue_Game:
                 self.curr_input_mode = self.input_modes["player_turn"]
                 self.curr_submenu = self.display_submenus["none"]
                 self.need_full_rerender = True
-                self._render_frame(self.scrsize_h, self.scrsize_w)
+                self._request_render()
                 self._update_top_label("")
             elif key == "g" and self.cheats_enabled:
                 # teleport cheat
-                success, targ_actor = self.player.teleport(
-                    self.dungeon,
-                    self.actor_map,
-                    self.item_list,
-                    self.item_map,
-                    self.target_r,
-                    self.target_c,
-                )
-                if success:
-                    # Check for murdered actor
-                    if targ_actor != None:
-                        message = f"You teleported, killing {targ_actor.get_name()}"
-                        # Killing via teleport is super cheesy, so no points are awarded here.
-                    else:
-                        message = f"You successfully teleported"
+                if self.engine.player_teleport(self.target_r, self.target_c):
                     # Return to player input
                     self.curr_input_mode = self.input_modes["player_turn"]
                     self.curr_submenu = self.display_submenus["none"]
                     self.need_full_rerender = True
-                    self._render_frame(self.scrsize_h, self.scrsize_w)
-                else:
-                    message = "You cannot teleport there"
-                self._update_top_label(message)
+                    self._request_render()
+                self._handle_engine_events()
             elif key == "i":
-                player_r, player_c = self.player.get_pos()
+                player_r, player_c = self.engine.player.get_pos()
                 # Double check that not inspecting yourself
                 if not (self.target_r == player_r and self.target_c == player_c):
                     # Attempt to grab monster, then attempt to grab item.
-                    if self.actor_map[self.target_r][self.target_c]:
-                        self.inspect_obj = self.actor_map[self.target_r][self.target_c]
+                    if self.engine.actor_map[self.target_r][self.target_c]:
+                        self.inspect_obj = self.engine.actor_map[self.target_r][self.target_c]
                         self._update_top_label(
                             f"Inspecting {self.inspect_obj.get_name()}"
                         )
@@ -759,8 +698,9 @@ class Pyrogue_Game:
                         self.curr_submenu = self.display_submenus["inspect_monster"]
                         self.need_submenu_rerender = True
                         self._render_monster_inspect(self.inspect_obj)
-                    elif self.item_map[self.target_r][self.target_c]:
-                        self.inspect_obj = self.item_map[self.target_r][self.target_c]
+                        self._request_render()
+                    elif self.engine.item_map[self.target_r][self.target_c]:
+                        self.inspect_obj = self.engine.item_map[self.target_r][self.target_c]
                         self._update_top_label(
                             f"Inspecting {self.inspect_obj.get_name()}"
                         )
@@ -768,87 +708,32 @@ class Pyrogue_Game:
                         self.curr_submenu = self.display_submenus["inspect_item"]
                         self.need_submenu_rerender = True
                         self._render_item_inspect(self.inspect_obj)
+                        self._request_render()
                     else:
                         message = "No monster or item to inspect"
                         self._update_top_label(message)
             elif key == "r":
-                # Attempt to do a ranged attack
-                attack_success, targ_actor, dmg = self.player.ranged_attack(
-                    self.dungeon,
-                    self.actor_map,
-                    self.item_list,
-                    self.item_map,
-                    self.target_r,
-                    self.target_c,
-                )
-                if attack_success:
-                    if targ_actor != None:
-                        # Check if targeted self
-                        if targ_actor == self.player:
-                            if targ_actor.is_alive():
-                                message = (
-                                    "Your ranged attack dealt "
-                                    + str(dmg)
-                                    + " dmg to *YOURSELF*"
-                                )
-                            else:
-                                message = (
-                                    "You know that the point is to survive, right?"
-                                )
-                                self.selfdeath = True
-                                targ_r, targ_c = targ_actor.get_pos()
-                                self.actor_map[targ_r][targ_c] = None
-                        else:
-                            if targ_actor.is_alive():
-                                message = (
-                                    "Your ranged attack dealt "
-                                    + str(dmg)
-                                    + " dmg to "
-                                    + targ_actor.get_name()
-                                )
-                            else:
-                                # Print kill message
-                                message = (
-                                    "You killed " + targ_actor.get_name() + " at range"
-                                )
-                                # Remove monster from map
-                                targ_r, targ_c = targ_actor.get_pos()
-                                self.actor_map[targ_r][targ_c] = None
-                                self.player_score += int(
-                                    targ_actor.get_score_val() * self.difficulty
-                                )
-
-                        self._update_hud()
-                        self._update_top_label(message)
-                        self.msg_log.append(message)
-
-                    # End player's turn? Attack was made, so yes
-                    end_turn = True
-                else:
-                    # Attack was unsuccessful
-                    # Two options: No ranged weapon or insufficient ammunition.
-                    if self.player.get_equipped_by_key("ranged") != None:
-                        # Player must have insufficient Ammunition
-                        message = "You do not have enough ammo"
-                    else:
-                        message = "You do not have a ranged weapon equipped"
-                    self._update_top_label(message)
+                # Attempt to do a ranged attack; ends the player's turn if an attack was made
+                end_turn = self.engine.player_ranged_attack(self.target_r, self.target_c)
+                if end_turn:
+                    self._update_hud()
+                self._handle_engine_events()
         else:
             # Attempt to move targeting cursor
             move = move_delta[key]
             new_r = self.target_r + delta_r[move.value]
             new_c = self.target_c + delta_c[move.value]
             # Now determine if targeting position is valid
-            if self.dungeon.valid_point(new_r, new_c):
+            if self.engine.dungeon.valid_point(new_r, new_c):
                 # Valid point within dungeon; is targeted tile visible to player, or x-ray render enabled?
                 if self.curr_render_mode == self.render_modes[
                     "x-ray"
-                ] or self.player.is_visible_tile(new_r, new_c):
+                ] or self.engine.player.is_visible_tile(new_r, new_c):
                     # Tile is otherwise known about, so it can be targeted by player.
                     self.target_c = new_c
                     self.target_r = new_r
                     # Update render for snappier feeling response
-                    self._render_frame(self.scrsize_h, self.scrsize_w)
+                    self._request_render()
 
         # Return if player's turn should end or not as result of targeting actions
         return end_turn
@@ -864,7 +749,7 @@ class Pyrogue_Game:
             self.curr_submenu = self.display_submenus["none"]
             self.inspect_obj = None  # Reset stored inspection pointer to None
             self.need_full_rerender = True
-            self._render_frame(self.scrsize_h, self.scrsize_w)
+            self._request_render()
             self._update_top_label("")
         elif key == "j" or key == "Down" or key == "2":
             # Scroll down
@@ -893,177 +778,6 @@ class Pyrogue_Game:
             if scroll_val > 0.0:
                 self.submenu_canvas.xview_scroll(-1, "units")
 
-    # Populates the actor_map with a dungeon size proportionate number of monsters.
-    def _generate_monsters(self):
-        attemptc = 0
-        monsterc = 0
-        size_modifier = self.mapsize_w * self.mapsize_h
-        attempt_limit = int(self.difficulty * size_modifier)
-        min_monsterc = max(1, int(size_modifier // 100 * self.difficulty))
-        # Adjust exp_chancetime's decay curve to increase additional monster probability with difficulty
-        decay_rate = 0.95 / (self.difficulty + 0.5)
-
-        # Generate monsters; runs until minimum number and attempt limit are met
-        while (monsterc < min_monsterc) or (attemptc < attempt_limit):
-            # Grab a monster type definition
-            mtypedef = self.monster_type_list[
-                random.randint(0, len(self.monster_type_list) - 1)
-            ]
-            if (
-                mtypedef.is_gen_eligible()
-                and random.randint(1, 101) >= mtypedef.get_rarity()
-            ):
-                # Create monster
-                new_monster = Monster(mtypedef)
-                if monsterc <= min_monsterc or exp_chancetime(
-                    monsterc - min_monsterc, decay_rate
-                ):
-                    if new_monster.init_pos(
-                        self.dungeon,
-                        self.actor_map,
-                        random.randint(1, self.mapsize_h - 2),
-                        random.randint(1, self.mapsize_w - 2),
-                    ):
-                        # Update gen eligibility of monster type; Newly generated monster True, force reset False
-                        new_monster.update_gen_eligible(True, False)
-                        monsterc += 1
-                        self.monster_list.append(new_monster)
-            attemptc += 1
-        print(
-            "MONSTERS:",
-            min_monsterc,
-            "Min monsters,",
-            attemptc,
-            "Placement attempts,",
-            monsterc,
-            "Placed",
-        )
-
-    # Populates the item_map with a dungeon size proportionate number of items.
-    def _generate_items(self):
-        attemptc = 0
-        itemc = 0
-        size_modifier = self.mapsize_w * self.mapsize_h
-        attempt_limit = size_modifier
-        min_itemc = max(1, int(size_modifier // 50))
-        decay_rate = 0.75
-
-        # Generate items; runs until minimum number and attempt limit are met
-        while (itemc < min_itemc) or (attemptc < attempt_limit):
-            # Grab a item type definition
-            itypedef = self.item_type_list[
-                random.randint(0, len(self.item_type_list) - 1)
-            ]
-            if (
-                itypedef.is_gen_eligible()
-                and random.randint(1, 101) >= itypedef.get_rarity()
-            ):
-                # Create Item
-                new_item = Item(itypedef)
-                if itemc <= min_itemc or exp_chancetime(itemc - min_itemc, decay_rate):
-                    if new_item.init_pos(
-                        self.dungeon,
-                        self.item_map,
-                        random.randint(1, self.mapsize_h - 2),
-                        random.randint(1, self.mapsize_w - 2),
-                    ):
-                        # Update gen eligibility of monster type; Newly generated monster True, force reset False
-                        new_item.update_gen_eligible(True, False)
-                        itemc += 1
-                        self.item_list.append(new_item)
-            attemptc += 1
-        print(
-            "ITEMS:",
-            min_itemc,
-            "Min items,",
-            attemptc,
-            "Placement attempts,",
-            itemc,
-            "Placed",
-        )
-
-    # Resets the generation eligibility for item/monster type definitions
-    def _reset_gen_eligibility(self):
-        # Reset monster generation eligibility
-        # Note that unique monsters only reset if they were not killed or if the game is over
-        for monster in self.monster_list:
-            # If game exit, force full reset. Otherwise depends on uniqueness and alive/dead
-            monster.update_gen_eligible(False, self.game_exit)
-
-        for item in self.item_list:
-            # If game exit, force full reset. Otherwise depends on uniqueness and used/unused
-            item.update_gen_eligible(False, self.game_exit)
-
-    # Initializes a new dungeon for the game to use; this also re-generates the monsters and restarts the turnloop.
-    def _replace_dungeon(self):
-
-        # Reset monster generation eligibility
-        self._reset_gen_eligibility()
-
-        # Ramp difficulty by 35%
-        self.difficulty *= 1.35
-
-        print(f"GAME: New dungeon level with difficulty {self.difficulty}")
-
-        # Init the dungeon itself
-        self.dungeon = Dungeon(self.mapsize_h, self.mapsize_w)
-        self.dungeon.generate_dungeon()
-
-        # Clear actor map, monster list, and priority queue
-        self.actor_map = [[None] * self.mapsize_w for _ in range(self.mapsize_h)]
-        self.item_map = [[None] * self.mapsize_w for _ in range(self.mapsize_h)]
-        self.monster_list = []
-        self.item_list = []
-        self.turn_pq = PriorityQueue()
-
-        # Set the player's position in the dungeon
-        while not self.player.init_pos(
-            self.dungeon,
-            self.actor_map,
-            random.randint(1, self.mapsize_h - 2),
-            random.randint(1, self.mapsize_w - 2),
-        ):
-            continue
-
-        # Generate new monsters
-        self._generate_monsters()
-
-        # Generate new items
-        self._generate_items()
-
-        # Restart the turn loop
-        self._start_turnloop()
-
-    # Initializes the game with randomly generated dungeon and monsters
-    # Dungeon is size_h * size_w, difficulty modifies monster spawn rates.
-    def _init_generated_game(self):
-        # Init dungeon
-        self.dungeon = Dungeon(self.mapsize_h, self.mapsize_w)
-        self.dungeon.generate_dungeon()
-
-        # Init actor map and item map
-        self.actor_map = [[None] * self.mapsize_w for _ in range(self.mapsize_h)]
-        self.item_map = [[None] * self.mapsize_w for _ in range(self.mapsize_h)]
-
-        # Init player
-        self.player = Player()
-        while not self.player.init_pos(
-            self.dungeon,
-            self.actor_map,
-            random.randint(1, self.mapsize_h - 2),
-            random.randint(1, self.mapsize_w - 2),
-        ):
-            continue
-
-        # Calculate the initial dungeon distance maps relative to the player character
-        pc_r, pc_c = self.player.get_pos()
-        self.dungeon.calc_dist_maps(pc_r, pc_c)
-
-        # Generate monsters to populate the dungeon
-        self._generate_monsters()
-        # Generate items
-        self._generate_items()
-
     # Wrapper to update top message label. Cyan is the default message color.
     def _update_top_label(self, message: str, font_color: str = "cyan"):
         if message != "":
@@ -1080,15 +794,15 @@ class Pyrogue_Game:
 
     # Helper to create the hud's line 1 string.
     def _hud_score_update(self):
-        r, c = self.player.get_pos()
-        self.score_msg = f"SCORE: {self.player_score:07d}   MODIFIER: {self.difficulty:.2f}   POS: (R:{r:0d}, C:{c:0d})"
+        r, c = self.engine.player.get_pos()
+        self.score_msg = f"SCORE: {self.engine.player_score:07d}   MODIFIER: {self.engine.difficulty:.2f}   POS: (R:{r:0d}, C:{c:0d})"
 
     # Helper to create the hud's line 2 string.
     def _hud_stats_update(self):
-        curr_hp = self.player.get_hp()
-        hp_cap = self.player.get_hp_cap()
-        curr_ammo = self.player.get_curr_ammo()
-        ammo_cap = self.player.get_ammo_cap()
+        curr_hp = self.engine.player.get_hp()
+        hp_cap = self.engine.player.get_hp_cap()
+        curr_ammo = self.engine.player.get_curr_ammo()
+        ammo_cap = self.engine.player.get_ammo_cap()
         self.hp_msg = f"{curr_hp:03d}/{hp_cap:03d}"
         self.ammo_msg = f"{curr_ammo:03d}/{ammo_cap:03d}"
 
@@ -1118,11 +832,11 @@ class Pyrogue_Game:
         self.hp_msg_color = f"#{hp_red:02X}{hp_green:02X}{blue:02X}"
         self.ammo_msg_color = f"#{ammo_red:02X}{ammo_green:02X}{blue:02X}"
 
-        self.pinfo_msg = f"HP:           AMMO:           DEFENSE: {self.player.get_defense():03d}   DODGE: {self.player.get_dodge():03d}"
+        self.pinfo_msg = f"HP:           AMMO:           DEFENSE: {self.engine.player.get_defense():03d}   DODGE: {self.engine.player.get_dodge():03d}"
 
     # Updates the player's hud (the two layers of text at the bottom of the screen)
     def _update_hud(self):
-        if not self.game_over:
+        if not self.engine.game_over:
             # Player score and position (line 1)
             self._hud_score_update()
             self.score_msg_color = "white"
@@ -1131,7 +845,7 @@ class Pyrogue_Game:
             self.pinfo_msg_color = "white"
         else:
             # Game over bottom messages
-            self.score_msg = f"FINAL SCORE: {self.player_score:06d}"
+            self.score_msg = f"FINAL SCORE: {self.engine.player_score:06d}"
             self.score_msg_color = "#00FF00"
 
             # Player stats (line 2)
@@ -1175,7 +889,7 @@ class Pyrogue_Game:
         self.scrsize_h = event.height
         self.scrsize_w = event.width
         self.need_full_rerender = True
-        self._render_frame(self.scrsize_h, self.scrsize_w)
+        self._request_render()
 
     # Handles creating/rendering the exit menu
     def _render_exit_menu(self):
@@ -1194,7 +908,7 @@ class Pyrogue_Game:
         )
         self.canvas.create_window(
             self.scrsize_w // 2,
-            (self.tile_size * self.mapsize_h // 2) + self.tile_size,
+            (self.tile_size * self.view_h // 2) + self.tile_size,
             height=menu_height,
             width=menu_width,
             window=self.submenu_canvas,
@@ -1252,11 +966,11 @@ class Pyrogue_Game:
         max_line_width = 0
 
         # Create lines first; longest line will determine menu width
-        for monster in self.monster_list:
+        for monster in self.engine.monster_list:
             r, c = monster.get_pos()
             if monster.is_alive():
                 if (
-                    self.player.visible_tiles[r][c]
+                    self.engine.player.is_visible_tile(r, c)
                     or self.curr_render_mode == self.render_modes["x-ray"]
                 ):
                     # Location known, so display that information
@@ -1274,13 +988,13 @@ class Pyrogue_Game:
             i += 1
 
         # Number of monsters + menu header
-        ideal_height = int((len(self.monster_list) + 2) * self.tile_size)
-        max_height = (self.mapsize_h - 3) * self.tile_size
+        ideal_height = int((len(self.engine.monster_list) + 2) * self.tile_size)
+        max_height = (self.view_h - 3) * self.tile_size
         visible_menu_height = min(ideal_height, max_height)
 
         # Not quite the whole screen width
         menu_width = min(
-            self.tile_size * (self.mapsize_w - 3),
+            self.tile_size * (self.view_w - 3),
             (self.tile_size // 1.85) * max_line_width,
         )
 
@@ -1306,7 +1020,7 @@ class Pyrogue_Game:
 
             self.canvas.create_window(
                 self.scrsize_w // 2,
-                (self.tile_size * self.mapsize_h // 2) + self.tile_size,
+                (self.tile_size * self.view_h // 2) + self.tile_size,
                 height=visible_menu_height,
                 width=menu_width,
                 window=self.submenu_canvas,
@@ -1323,7 +1037,7 @@ class Pyrogue_Game:
         self.submenu_canvas.create_text(
             menu_width // 2,
             int(offset * 1.5),
-            text=f"Monsters ({len(self.monster_list)} listed)",
+            text=f"Monsters ({len(self.engine.monster_list)} listed)",
             fill="red",
             font=(self.def_font, self.font_size),
             tag="mlist_header",
@@ -1333,7 +1047,7 @@ class Pyrogue_Game:
         # Add all text lines to display
         i = 0
         for text in lines:
-            monster = self.monster_list[i]
+            monster = self.engine.monster_list[i]
             color = "white" if monster.is_alive() else "grey"
             # Monster name and coordinate
             self.submenu_canvas.create_text(
@@ -1346,7 +1060,7 @@ class Pyrogue_Game:
                 anchor="nw",
             )
 
-            color = monster.get_color() if monster.is_alive() else "grey"
+            color = monster.get_color(self.anim_frame) if monster.is_alive() else "grey"
             # Add in monster character separately, with color
             self.submenu_canvas.create_text(
                 offset + int(self.tile_size * 2.25),
@@ -1373,7 +1087,7 @@ class Pyrogue_Game:
         max_line_width = 22  # Minimum based on "00: --- EMPTY --- <-- "
 
         # Create lines first; longest line will determine menu width
-        inventory = self.player.get_inventory_slots()
+        inventory = self.engine.player.get_inventory_slots()
         # Ideally isize is the same as player.get_inventory_size().
         # In reality, this will print any extra items, enabling easier error checking.
         isize = len(inventory)
@@ -1408,12 +1122,12 @@ class Pyrogue_Game:
         # Number of inventory slots + menu header
         line_count = len(lines)
         ideal_height = int((line_count + 1) * self.tile_size)
-        max_height = (self.mapsize_h - 3) * self.tile_size
+        max_height = (self.view_h - 3) * self.tile_size
         visible_menu_height = min(ideal_height, max_height)
 
         # Not quite the whole screen width
         menu_width = min(
-            self.tile_size * (self.mapsize_w - 3),
+            self.tile_size * (self.view_w - 3),
             (self.tile_size // 1.85) * max_line_width,
         )
 
@@ -1433,7 +1147,7 @@ class Pyrogue_Game:
 
             self.canvas.create_window(
                 self.scrsize_w // 2,
-                (self.tile_size * self.mapsize_h // 2) + self.tile_size,
+                (self.tile_size * self.view_h // 2) + self.tile_size,
                 height=visible_menu_height,
                 width=menu_width,
                 window=self.submenu_canvas,
@@ -1487,14 +1201,14 @@ class Pyrogue_Game:
         }
 
         equipped_items = {
-            0: self.player.get_weapon(),
-            1: self.player.get_ranged(),
-            2: self.player.get_offhand(),
-            3: self.player.get_armor(),
-            4: self.player.get_amulet(),
-            5: self.player.get_ring_l(),
-            6: self.player.get_ring_r(),
-            7: self.player.get_light(),
+            0: self.engine.player.get_weapon(),
+            1: self.engine.player.get_ranged(),
+            2: self.engine.player.get_offhand(),
+            3: self.engine.player.get_armor(),
+            4: self.engine.player.get_amulet(),
+            5: self.engine.player.get_ring_l(),
+            6: self.engine.player.get_ring_r(),
+            7: self.engine.player.get_light(),
         }
 
         # Create lines first; longest line will determine menu width. 8 equipment slots.
@@ -1529,12 +1243,12 @@ class Pyrogue_Game:
         # Number of equipment slots + menu header
         line_count = len(lines)
         ideal_height = int((line_count + 1) * self.tile_size)
-        max_height = (self.mapsize_h - 3) * self.tile_size
+        max_height = (self.view_h - 3) * self.tile_size
         visible_menu_height = min(ideal_height, max_height)
 
         # Not quite the whole screen width
         menu_width = min(
-            self.tile_size * (self.mapsize_w - 3),
+            self.tile_size * (self.view_w - 3),
             (self.tile_size // 1.85) * max_line_width,
         )
 
@@ -1554,7 +1268,7 @@ class Pyrogue_Game:
 
             self.canvas.create_window(
                 self.scrsize_w // 2,
-                (self.tile_size * self.mapsize_h // 2) + self.tile_size,
+                (self.tile_size * self.view_h // 2) + self.tile_size,
                 height=visible_menu_height,
                 width=menu_width,
                 window=self.submenu_canvas,
@@ -1593,7 +1307,7 @@ class Pyrogue_Game:
         desc_lines = monster.get_desc()
         line_count = 8 + len(desc_lines)
 
-        longest_line = self.mapsize_w  # default to at least the dungeon width
+        longest_line = self.view_w  # default to at least the viewport width
         # Determine what is actually the longest line, depending on description lines
         for line in desc_lines:
             new_len = len(line)
@@ -1602,12 +1316,12 @@ class Pyrogue_Game:
 
         # Determine screen sizing, both visible and full scrollable size
         ideal_height = int((line_count + 1) * self.tile_size)
-        max_height = (self.mapsize_h - 3) * self.tile_size
+        max_height = (self.view_h - 3) * self.tile_size
         ideal_width = int(
             longest_line * (self.tile_size / 1.85)
         )  # This may need to be adjusted
         visible_menu_height = min(ideal_height, max_height)
-        visible_menu_width = min(self.tile_size * (self.mapsize_w - 3), ideal_width)
+        visible_menu_width = min(self.tile_size * (self.view_w - 3), ideal_width)
 
         # Attempt to grab current x/y scroll values to return to it
         try:
@@ -1632,7 +1346,7 @@ class Pyrogue_Game:
 
             self.canvas.create_window(
                 self.scrsize_w // 2,
-                (self.tile_size * self.mapsize_h // 2) + self.tile_size,
+                (self.tile_size * self.view_h // 2) + self.tile_size,
                 height=visible_menu_height,
                 width=visible_menu_width,
                 window=self.submenu_canvas,
@@ -1654,7 +1368,7 @@ class Pyrogue_Game:
         curr_line = 0.3  # Weird value in attempt to center text
 
         # Symbol (separate for defined color, appears on same line as name)
-        color = monster.get_color()
+        color = monster.get_color(self.anim_frame)
         self.submenu_canvas.create_text(
             offset,
             curr_line * self.tile_size,
@@ -1779,7 +1493,7 @@ class Pyrogue_Game:
         else:
             line_count = 8 + len(desc_lines)
 
-        longest_line = self.mapsize_w  # default to at least the dungeon width
+        longest_line = self.view_w  # default to at least the viewport width
         # Determine what is actually the longest line, depending on description lines
         for line in desc_lines:
             new_len = len(line)
@@ -1788,12 +1502,12 @@ class Pyrogue_Game:
 
         # Determine screen sizing, both visible and full scrollable size
         ideal_height = int((line_count + 1) * self.tile_size)
-        max_height = (self.mapsize_h - 3) * self.tile_size
+        max_height = (self.view_h - 3) * self.tile_size
         ideal_width = int(
             longest_line * (self.tile_size / 1.85)
         )  # This may need to be adjusted
         visible_menu_height = min(ideal_height, max_height)
-        visible_menu_width = min(self.tile_size * (self.mapsize_w - 3), ideal_width)
+        visible_menu_width = min(self.tile_size * (self.view_w - 3), ideal_width)
 
         # Attempt to grab current x/y scroll values to return to it
         try:
@@ -1818,7 +1532,7 @@ class Pyrogue_Game:
 
             self.canvas.create_window(
                 self.scrsize_w // 2,
-                (self.tile_size * self.mapsize_h // 2) + self.tile_size,
+                (self.tile_size * self.view_h // 2) + self.tile_size,
                 height=visible_menu_height,
                 width=visible_menu_width,
                 window=self.submenu_canvas,
@@ -1840,7 +1554,7 @@ class Pyrogue_Game:
         curr_line = 0.3  # Weird value in attempt to center text
 
         # Symbol (separate for defined color, appears on same line as name)
-        color = item.get_color()
+        color = item.get_color(self.anim_frame)
         self.submenu_canvas.create_text(
             offset,
             curr_line * self.tile_size,
@@ -2132,15 +1846,108 @@ class Pyrogue_Game:
         self.submenu_canvas.yview_moveto(y_scroll_val)
         self.submenu_canvas.xview_moveto(x_scroll_val)
 
-    # Renders the dungeon to the screen canvas.
-    def _render_frame(self, height, width):
-        max_tile_width = width // self.mapsize_w
-        max_tile_height = (
-            height // self.scrn_rows
-        )  # Note that there are 3 extra rows for messages / player information
+    # Returns True if the dungeon tile (row, col) is on screen, inside the border of the viewport.
+    def _is_on_screen(self, row: int, col: int) -> bool:
+        return (
+            self.cam_r < row < self.cam_r + self.view_h - 1
+            and self.cam_c < col < self.cam_c + self.view_w - 1
+        )
+
+    # Returns the set of displayed tiles (flat indices) whose look changes every frame:
+    # monsters / items with more than one color, and the flickering targeting cursor.
+    def _get_animated_cells(self) -> set:
+        animated_cells = set()
+        if self.curr_input_mode == self.input_modes["targeting"]:
+            animated_cells.add(self.target_r * self.engine.mapsize_w + self.target_c)
+
+        # Distance map displays show no actors or items
+        if self.curr_render_mode == self.render_modes["standard"]:
+            is_shown = self.engine.player.is_visible_tile
+        elif self.curr_render_mode == self.render_modes["x-ray"]:
+            is_shown = lambda row, col: True
+        else:
+            return animated_cells
+
+        for monster in self.engine.monster_list:
+            if monster.is_alive() and len(monster.typedef.colors) > 1:
+                r, c = monster.get_pos()
+                if is_shown(r, c) and self._is_on_screen(r, c):
+                    animated_cells.add(r * self.engine.mapsize_w + c)
+        for item in self.engine.item_list:
+            if (
+                len(item.typedef.colors) > 1
+                and self.engine.item_map[item.r][item.c] is item
+                and is_shown(item.r, item.c)
+                and self._is_on_screen(item.r, item.c)
+            ):
+                animated_cells.add(item.r * self.engine.mapsize_w + item.c)
+        return animated_cells
+
+    # Requests that the dungeon be rendered to the screen canvas.
+    # Every request made before the next frame is drawn is handled by that one frame.
+    def _request_render(self):
+        if self.render_after_id is not None:
+            # Frame already scheduled
+            return
+        delay = self.last_render_time + 1 / self.max_fps - time.perf_counter()
+        self.render_after_id = self.root.after(max(int(delay * 1000), 0), self._scheduled_render)
+
+    # Draws a frame requested with _request_render.
+    def _scheduled_render(self):
+        self.render_after_id = None
+        if self.game_exit:
+            return
+        self.last_render_time = time.perf_counter()
+        self._render_frame(self.scrsize_h, self.scrsize_w)
+
+        # Keep animating while anything on screen is animated; otherwise, stay idle until something else happens
+        if self.anim_after_id is None and self._is_animated():
+            self.anim_after_id = self.root.after(self.anim_interval, self._animation_tick)
+
+    # Animation tick; advances the animation clock, and renders the tiles that changed color.
+    def _animation_tick(self):
+        self.anim_after_id = None
+        self.anim_frame += 1
+        self._request_render()
+
+    # Returns True if anything on screen changes color from frame to frame.
+    def _is_animated(self) -> bool:
+        if self.curr_submenu in (
+            self.display_submenus["menu_monster_list"],
+            self.display_submenus["inspect_monster"],
+            self.display_submenus["inspect_item"],
+        ):
+            return True
+        return bool(self._get_animated_cells())
+
+    # Sizes the viewport and its tiles to fit a screen of the given size in pixels.
+    def _fit_viewport(self, height, width):
+        # Show as much of the dungeon as fits with tiles of at least min_tile_size; 3 rows are for messages / player info
+        self.view_h = min(self.engine.mapsize_h, max(height // self.min_tile_size - 3, 3))
+        self.view_w = min(self.engine.mapsize_w, max(width // self.min_tile_size, 3))
+
+        # number of char 'rows' in screen; one for each row in viewport + 3 for messages / player info
+        self.scrn_rows = self.view_h + 3
+        max_tile_width = width // self.view_w
+        max_tile_height = height // self.scrn_rows
         self.tile_size = min(max_tile_width, max_tile_height)
         self.font_size = int(self.tile_size / 1.5)
 
+    # Returns the camera position along one axis that keeps pos shown at least cam_margin tiles inside the viewport,
+    # scrolling from cam as little as possible, and never past the edges of the dungeon.
+    def _scroll_camera_axis(self, cam: int, pos: int, view: int, size: int) -> int:
+        margin = min(self.cam_margin, (view - 3) // 2)
+        # The outer ring of the viewport is covered by the border, so shown tiles are cam + 1 to cam + view - 2
+        if pos < cam + 1 + margin:
+            cam = pos - 1 - margin
+        elif pos > cam + view - 2 - margin:
+            cam = pos - view + 2 + margin
+        return max(0, min(cam, size - view))
+
+    # Renders the dungeon to the screen canvas.
+    def _render_frame(self, height, width):
+        self._fit_viewport(height, width)
+
         terrain_char = {
             Dungeon.Terrain.floor: ".",
             Dungeon.Terrain.stair: ">",
@@ -2148,21 +1955,32 @@ class Pyrogue_Game:
             Dungeon.Terrain.immrock: "X",
             Dungeon.Terrain.debug: " ",
         }
+        # The same, by terrain code, for the player's terrain memory
+        memory_char = {terrain.value: char for terrain, char in terrain_char.items()}
+        memory_char[terrain_unknown] = " "
 
-        x_offset = (width - self.tile_size * self.mapsize_w) // 2  # To center
+        if self.need_full_rerender:
+            # Runs of text are laid out by the font itself, so their columns have to be a glyph wide
+            if self.row_run_render:
+                font = tkfont.Font(root=self.root, family=self.def_font, size=self.font_size)
+                self.col_pitch = font.measure("#")
+            else:
+                self.col_pitch = self.tile_size
+
+        x_offset = (width - self.col_pitch * self.view_w) // 2  # To center
         y_offset = self.tile_size  # To leave room for top message
 
         if self.need_full_rerender:
             self.render_cache.clear()
 
             # Calculate dungeon bounds in pixels
-            dungeon_left = x_offset + self.tile_size
+            dungeon_left = x_offset + self.col_pitch
             dungeon_top = y_offset + self.tile_size
             dungeon_right = (
-                dungeon_left + ((self.mapsize_w - 1) * self.tile_size) - self.tile_size
+                dungeon_left + ((self.view_w - 1) * self.col_pitch) - self.col_pitch
             )
             dungeon_bottom = (
-                dungeon_top + ((self.mapsize_h - 1) * self.tile_size) - self.tile_size
+                dungeon_top + ((self.view_h - 1) * self.tile_size) - self.tile_size
             )
 
             # Deleting existing messages and border
@@ -2182,7 +2000,7 @@ class Pyrogue_Game:
             )
 
             # Draw score message label
-            y = int((self.mapsize_h + 0.5) * self.tile_size)
+            y = int((self.view_h + 0.5) * self.tile_size)
             self.canvas.create_text(
                 x + self.tile_size // 2,
                 y + self.tile_size // 2.5,
@@ -2240,6 +2058,23 @@ class Pyrogue_Game:
                 tag="dungeon_border",
             )
 
+            if self.row_run_render:
+                # Runs are created as rows are rendered below
+                self.tile_items = []
+                self.row_items = [[] for _ in range(self.view_h)]
+            else:
+                # Create an (empty) text item for every tile on screen; filled in below as tiles are rendered
+                self.row_items = []
+                self.tile_items = [None] * (self.view_h * self.view_w)
+                for row in range(1, self.view_h - 1):
+                    for col in range(1, self.view_w - 1):
+                        self.tile_items[row * self.view_w + col] = self.canvas.create_text(
+                            col * self.col_pitch + x_offset + self.col_pitch // 2,
+                            row * self.tile_size + y_offset + self.tile_size // 2,
+                            text="",
+                            font=(self.def_font, self.font_size),
+                        )
+
         # To loop through monster / item symbol colors in submenu
         if self.curr_submenu == self.display_submenus["menu_monster_list"]:
             self._render_monster_list()
@@ -2248,239 +2083,272 @@ class Pyrogue_Game:
         elif self.curr_submenu == self.display_submenus["inspect_item"]:
             self._render_item_inspect(self.inspect_obj)
 
-        self.need_full_rerender = False
+        # Changes to what the player can see since the last frame
+        vision = self.engine.player.fov.take_diff()
 
         # To check if targeting mode is active
         is_targeting = self.curr_input_mode == self.input_modes["targeting"]
+        # A targeting cursor on a tile that went out of view goes back to the player
+        if (
+            is_targeting
+            and self.curr_render_mode != self.render_modes["x-ray"]
+            and self.target_r * self.engine.mapsize_w + self.target_c in vision.left
+        ):
+            self.target_r, self.target_c = self.engine.player.get_pos()
+
+        # Scroll the viewport to follow the targeting cursor while targeting, and the player otherwise
+        follow_r, follow_c = (self.target_r, self.target_c) if is_targeting else self.engine.player.get_pos()
+        self.cam_r = self._scroll_camera_axis(self.cam_r, follow_r, self.view_h, self.engine.mapsize_h)
+        self.cam_c = self._scroll_camera_axis(self.cam_c, follow_c, self.view_w, self.engine.mapsize_w)
+
+        # Determine which tiles need checking; only ones that might have changed, unless everything might have.
+        # Distance map displays change all over whenever the player moves, so they always check everything.
+        # Once the camera scrolls, every tile on screen shows a different dungeon tile, so every tile is checked too;
+        # the cost stays bounded by the size of the screen, and only tiles that look different are redrawn.
+        if (
+            self.need_full_rerender
+            or self.engine.dungeon is not self.render_dungeon
+            or self.curr_render_mode == self.render_modes["walkmap"]
+            or self.curr_render_mode == self.render_modes["tunnmap"]
+            or (self.cam_r, self.cam_c) != self.render_cam
+        ):
+            self.engine.dungeon.take_dirty_cells()
+            render_cells = [
+                row * self.engine.mapsize_w + col
+                for row in range(self.cam_r + 1, self.cam_r + self.view_h - 1)
+                for col in range(self.cam_c + 1, self.cam_c + self.view_w - 1)
+            ]
+        else:
+            render_cells = self.engine.dungeon.take_dirty_cells()
+            # Tiles that came into view, went out of view, or whose remembered terrain changed
+            render_cells |= vision.entered
+            render_cells |= vision.left
+            render_cells |= vision.remembered
+            # Animated tiles only change when the animation clock advances
+            if self.anim_frame != self.render_anim_frame:
+                render_cells |= self._get_animated_cells()
+            # The targeting cursor's tile, and its last tile once it moves away
+            if self.render_cursor is not None:
+                render_cells.add(self.render_cursor[0] * self.engine.mapsize_w + self.render_cursor[1])
+            if is_targeting:
+                render_cells.add(self.target_r * self.engine.mapsize_w + self.target_c)
+        self.render_dungeon = self.engine.dungeon
+        self.render_cam = (self.cam_r, self.cam_c)
+        self.render_anim_frame = self.anim_frame
+        self.render_cursor = (self.target_r, self.target_c) if is_targeting else None
 
-        for row in range(self.mapsize_h):
-            for col in range(self.mapsize_w):
-                is_border_tile = (
-                    row == 0
-                    or col == 0
-                    or row == self.mapsize_h - 1
-                    or col == self.mapsize_w - 1
-                )
+        self.need_full_rerender = False
 
-                if not is_border_tile:
-                    x = col * self.tile_size + x_offset
-                    y = row * self.tile_size + y_offset
-
-                    # default
-                    char = "#"
-                    color = "gray15"
-
-                    # determine the current render mode to grab char & color
-                    if self.curr_render_mode == self.render_modes["standard"]:
-                        actor = self.actor_map[row][col]
-                        item = self.item_map[row][col]
-                        if self.player.is_visible_tile(row, col):
-                            # Tile is visible, just render as normal.
-                            if is_targeting and (
-                                col == self.target_c and row == self.target_r
-                            ):
-                                # Targeting cursor
-                                char = "@"
-                                color = "white" if random.randint(0, 1) > 0 else "cyan"
-                            elif actor:
-                                char = actor.get_char()
-                                color = actor.get_color()
-                            elif item:
-                                char = item.get_char()
-                                color = item.get_color()
-                            else:
-                                terrain = self.dungeon.get_terrain_at(row, col)
-                                char = terrain_char[terrain]
-                                color = "white"
-                        else:
-                            # Tile is not visible, so only render player's remembered terrain.
-                            terrain = self.player.tmem[row][col]
-                            char = terrain_char[terrain]
-                    elif self.curr_render_mode == self.render_modes["x-ray"]:
-                        # Ignoring player memory of dungeon; just displaying dungeon
-                        actor = self.actor_map[row][col]
-                        item = self.item_map[row][col]
+        # Viewport rows with a changed tile, when rendering row runs
+        changed_rows = set()
+
+        for idx in render_cells:
+            row, col = divmod(idx, self.engine.mapsize_w)
+            # Position of the tile in the viewport
+            view_r = row - self.cam_r
+            view_c = col - self.cam_c
+            # Tiles off screen, or under the border, aren't drawn
+            is_hidden_tile = (
+                view_r <= 0
+                or view_c <= 0
+                or view_r >= self.view_h - 1
+                or view_c >= self.view_w - 1
+            )
+
+            if not is_hidden_tile:
+                # default
+                char = "#"
+                color = "gray15"
+
+                # determine the current render mode to grab char & color
+                if self.curr_render_mode == self.render_modes["standard"]:
+                    actor = self.engine.actor_map[row][col]
+                    item = self.engine.item_map[row][col]
+                    if self.engine.player.is_visible_tile(row, col):
+                        # Tile is visible, just render as normal.
                         if is_targeting and (
                             col == self.target_c and row == self.target_r
                         ):
                             # Targeting cursor
                             char = "@"
-                            color = "white" if random.randint(0, 1) > 0 else "cyan"
+                            color = "white" if self.anim_frame % 2 else "cyan"
                         elif actor:
                             char = actor.get_char()
-                            color = actor.get_color()
+                            color = actor.get_color(self.anim_frame)
                         elif item:
                             char = item.get_char()
-                            color = item.get_color()
+                            color = item.get_color(self.anim_frame)
                         else:
-                            terrain = self.dungeon.get_terrain_at(row, col)
+                            terrain = self.engine.dungeon.get_terrain_at(row, col)
                             char = terrain_char[terrain]
                             color = "white"
-                    elif self.curr_render_mode == self.render_modes["walkmap"]:
-                        # Grab walkmap character
-                        val = self.dungeon.get_walking_weight_at(row, col)
-                        if val == 0:
-                            char = "@"
-                            color = "gold"
-                        elif val == float("inf"):
-                            char = " "
-                        else:
-                            val = val % 10
-                            char = f"{val}"
-                    elif self.curr_render_mode == self.render_modes["tunnmap"]:
-                        # Grab walkmap character
-                        val = self.dungeon.get_tunneling_weight_at(row, col)
-                        if val == 0:
-                            char = "@"
-                            color = "gold"
-                        elif val == float("inf"):
-                            char = " "
-                        else:
-                            val = val % 10
-                            char = f"{val}"
-
-                    # Use a tuple to represent what should be rendered at this tile
-                    current_draw = (char, color)
-                    cached_draw = self.render_cache.get((row, col))
-
-                    # Only redraw if changed
-                    if current_draw != cached_draw:
-                        self.render_cache[(row, col)] = current_draw
-
-                        # First, remove anything previously drawn at this location
-                        self.canvas.delete(f"tile_{row}_{col}")
-
-                        # Draw black background (optional)
-                        self.canvas.create_rectangle(
-                            x,
-                            y,
-                            x + self.tile_size,
-                            y + self.tile_size,
-                            fill="black",
-                            outline="",
-                            tag=f"tile_{row}_{col}",
-                        )
-                        # Draw character
-                        self.canvas.create_text(
-                            x + self.tile_size // 2,
-                            y + self.tile_size // 2,
-                            text=char,
-                            fill=color,
-                            font=(self.def_font, self.font_size),
-                            tag=f"tile_{row}_{col}",
+                    else:
+                        # Tile is not visible, so only render player's remembered terrain.
+                        char = memory_char[self.engine.player.tmem[idx]]
+                elif self.curr_render_mode == self.render_modes["x-ray"]:
+                    # Ignoring player memory of dungeon; just displaying dungeon
+                    actor = self.engine.actor_map[row][col]
+                    item = self.engine.item_map[row][col]
+                    if is_targeting and (
+                        col == self.target_c and row == self.target_r
+                    ):
+                        # Targeting cursor
+                        char = "@"
+                        color = "white" if self.anim_frame % 2 else "cyan"
+                    elif actor:
+                        char = actor.get_char()
+                        color = actor.get_color(self.anim_frame)
+                    elif item:
+                        char = item.get_char()
+                        color = item.get_color(self.anim_frame)
+                    else:
+                        terrain = self.engine.dungeon.get_terrain_at(row, col)
+                        char = terrain_char[terrain]
+                        color = "white"
+                elif self.curr_render_mode == self.render_modes["walkmap"]:
+                    # Grab walkmap character
+                    val = self.engine.dungeon.get_walking_weight_at(row, col)
+                    if val == 0:
+                        char = "@"
+                        color = "gold"
+                    elif val == dist_unreached:
+                        char = " "
+                    else:
+                        val = val % 10
+                        char = f"{val}"
+                elif self.curr_render_mode == self.render_modes["tunnmap"]:
+                    # Grab walkmap character
+                    val = self.engine.dungeon.get_tunneling_weight_at(row, col)
+                    if val == 0:
+                        char = "@"
+                        color = "gold"
+                    elif val == dist_unreached:
+                        char = " "
+                    else:
+                        val = val % 10
+                        char = f"{val}"
+
+                # Use a tuple to represent what should be rendered at this tile
+                current_draw = (char, color)
+                cached_draw = self.render_cache.get((view_r, view_c))
+
+                # Only redraw if changed
+                if current_draw != cached_draw:
+                    self.render_cache[(view_r, view_c)] = current_draw
+
+                    if self.row_run_render:
+                        changed_rows.add(view_r)
+                    else:
+                        # Update the tile's text item; the canvas background is already black
+                        self.canvas.itemconfig(
+                            self.tile_items[view_r * self.view_w + view_c], text=char, fill=color
                         )
 
-    # Starts the game's turnloop
-    def _start_turnloop(self):
-        self.turn_pq = PriorityQueue()
-        self.player.set_currturn(0)
-        self.turn_pq.push(self.player, 0)
-        for monster in self.monster_list:
-            monster.set_currturn(monster.get_speed())
-            # 9 to ensure that ALL monsters get a turn after player's first turn
-            self.turn_pq.push(monster, monster.get_currturn())
-        # print("GAME: Turnloop started")
-        self._next_turn()
+        for row in changed_rows:
+            self._render_row_runs(row, x_offset, y_offset)
+
+    # Redraws a viewport row as one text item per run of same-colored tiles, from the render cache.
+    def _render_row_runs(self, row: int, x_offset: int, y_offset: int):
+        for item_id in self.row_items[row]:
+            self.canvas.delete(item_id)
+        self.row_items[row] = []
+
+        y = row * self.tile_size + y_offset + self.tile_size // 2
+        last_col = self.view_w - 1
+        col = 1
+        while col < last_col:
+            char, color = self.render_cache[(row, col)]
+            if char == " ":
+                # Nothing to see; not worth starting a run here
+                col += 1
+                continue
+
+            # Spaces look the same in any color, so they can join any run
+            run_start = col
+            run_chars = []
+            while col < last_col:
+                char, tile_color = self.render_cache[(row, col)]
+                if char != " " and tile_color != color:
+                    break
+                run_chars.append(char)
+                col += 1
+
+            self.row_items[row].append(
+                self.canvas.create_text(
+                    run_start * self.col_pitch + x_offset,
+                    y,
+                    text="".join(run_chars).rstrip(),
+                    fill=color,
+                    font=(self.def_font, self.font_size),
+                    anchor="w",
+                )
+            )
+
+    # Applies the events reported by the engine since they were last handled.
+    def _handle_engine_events(self):
+        for event in self.engine.take_events():
+            if event.type == Pyrogue_Engine.event_types["message"]:
+                self._update_top_label(event.message, event.color)
+            elif event.type == Pyrogue_Engine.event_types["new_level"]:
+                # The new dungeon is rendered in full on its own; the hud shows the new position and difficulty
+                self._update_hud()
+            elif event.type == Pyrogue_Engine.event_types["game_over"]:
+                # Reveal the whole dungeon
+                self.curr_render_mode = self.render_modes["x-ray"]
+                self.need_full_rerender = True
+                self._request_render()
+                self._update_hud()
 
     # Ends the game, destroying the canvas and unbinding event listeners.
     def _end_game(self):
         self.game_exit = True
+        # Cancel any frame or animation waiting to be drawn
+        if self.render_after_id is not None:
+            self.root.after_cancel(self.render_after_id)
+            self.render_after_id = None
+        if self.anim_after_id is not None:
+            self.root.after_cancel(self.anim_after_id)
+            self.anim_after_id = None
         # Destroy the canvas for this game, also unbinding event listeners
         self.canvas.unbind("<Configure>")
         self.canvas.destroy()
         self.root.unbind("<Key>")
-        self._reset_gen_eligibility()
+        self.engine.reset_gen_eligibility(self.game_exit)
         # Relinquish control back to the main menu
         self.menu_main.toggle_ingame()
 
-    # Handles a single turn in the turnloop.
+    # Handles turns in the turnloop.
+    # With batched turns, handles every monster turn up to the player's next turn before rendering; otherwise handles a single turn.
     def _next_turn(self):
         # Stop calling _next_turn if user is exiting game
         if self.game_exit:
             return
 
-        # loop for re-rendering the dungeon
-        if self.curr_input_mode != self.input_modes["none"] or self.game_over:
-            self._render_frame(self.scrsize_h, self.scrsize_w)
-            self.root.after(200, self._next_turn)
-            return
-
-        # Game over check
-        if not self.player.is_alive():
-            # You were defeated; game over
-            if self.selfdeath:
-                message = "You went out on your own terms; Game Over"
-            else:
-                message = "You have been defeated; Game Over"
-            self._update_top_label(message, "red")
-            self.msg_log.append(message)
-            print("=== GAME OVER ===")
-            self.curr_render_mode = self.render_modes["x-ray"]
-            self.need_full_rerender = True
-            self.game_over = True
-            self.root.after(200, self._next_turn)
-            self._update_hud()
+        # The turnloop pauses while waiting on input, and stops once the game is over.
+        # Input handlers restart it once the player's turn is done; animation ticks keep the screen alive until then.
+        if self.curr_input_mode != self.input_modes["none"] or self.engine.game_over:
+            self._request_render()
             return
 
-        # Level clear check
-        if len(self.turn_pq) < 2:
-            # Just the player is left; print level clear message
-            message = "Level Clear"
-            self._update_top_label(message, "gold")
-
-        self._render_frame(self.scrsize_h, self.scrsize_w)
-
-        # Pop actor; check if player turn
-        _, actor = self.turn_pq.pop()
-        player_turn = isinstance(actor, Player)
-
-        if actor.is_alive():
-            r, c = actor.get_pos()
-            # print(
-            #     f"TURN {actor.get_currturn()} for {actor.get_name()} at (r:{r:0d}, c: {c:0d}) with speed {actor.get_speed()}"
-            # )
+        if self.batch_turns:
+            # Handle every turn up to the player's, unless it takes long enough that tkinter needs to handle its events
+            self.engine.run_turns(deadline=time.perf_counter() + self.turn_batch_budget)
+        else:
+            self.engine.run_turns(max_turns=1)
+        self._handle_engine_events()
 
-            if player_turn:
-                # Await player input to call its turn handeler
-                # Essentially 'pauses' the turnloop until keyboard input results in end of player turn
-                if self.curr_input_mode != self.input_modes["player_turn"]:
-                    # Update bottom messages for player location and score
-                    self._update_hud()
-                    self.curr_input_mode = self.input_modes["player_turn"]
-                    return
-            else:
-                # Call the monster's turn handler directly
-                success, targ_actor, dmg = actor.handle_turn(
-                    self.dungeon,
-                    self.actor_map,
-                    self.item_list,
-                    self.item_map,
-                    self.player,
-                    8,
-                )
+        if self.engine.game_over:
+            return
 
-            # Re-queue monster
-            new_turn = actor.get_currturn() + (1000 // actor.get_speed())
-            actor.set_currturn(new_turn)
-            self.turn_pq.push(actor, new_turn)
-
-            if isinstance(targ_actor, Player) and dmg != 0:
-                message = actor.get_name() + " dealt " + str(dmg) + " damage to you"
-
-                self._update_top_label(message)
-                self.msg_log.append(message)
-        elif actor.is_boss():
-            # Killed a boss monster; Game ends
-            message = f"{actor.get_name()} (BOSS) defeated; Game Over"
-            self._update_top_label(message, "gold")
-            print(message)
-            self.msg_log.append(message)
-            print("=== GAME OVER ===")
-            self.curr_render_mode = self.render_modes["x-ray"]
-            self.need_full_rerender = True
-            self.game_over = True
-            self.root.after(200, self._next_turn)
+        if self.engine.awaiting_player:
+            # Show the results of every monster turn since the player's last turn
+            self._request_render()
+            # Update bottom messages for player location and score
             self._update_hud()
+            # Essentially 'pauses' the turnloop until keyboard input results in end of player turn
+            self.curr_input_mode = self.input_modes["player_turn"]
+            return
 
-        # Wait 1ms before running next turn
+        # Out of turns or time for this batch; show progress so far, then continue after tkinter handles its events
+        self._request_render()
         self.root.after(1, self._next_turn)
@@ -1,4 +1,5 @@
 import tkinter as tk
+from .engine import dungeon_size_setting, difficulty_setting
 from .game import Pyrogue_Game
 from .parsedesc import *
 
@@ -7,18 +8,11 @@ from .parsedesc import *
 
 # The Menu_Main class handles the main menu, it's sub-menus, and the main menu's control.
 class Menu_Main:
-    # Pre-defined dungeon sizes
-    dungeon_size_setting = {
-        0: (15, 30),
-        1: (20, 40),
-        2: (25, 50),
-        3: (30, 60),
-        4: (35, 70),
-        5: (40, 80),
-    }
-
-    # Pre-defined difficulty settings
-    difficulty_setting = {0: 0.05, 1: 0.1, 2: 0.25, 3: 0.5, 4: 0.75, 5: 1.00}
+    # Pre-defined dungeon sizes (see engine.py)
+    dungeon_size_setting = dungeon_size_setting
+
+    # Pre-defined difficulty settings (see engine.py)
+    difficulty_setting = difficulty_setting
     
     # Menu_Main constructor.
     def __init__(self, root, scrsize_h: int, scrsize_w: int):
@@ -0,0 +1,340 @@
+import argparse
+import contextlib
+import copy
+import io
+import json
+import random
+import sys
+import time
+from .actor import *
+from .dungeon import Dungeon
+from .engine import dungeon_size_setting
+from .parsedesc import parse_monster_typedefs
+from .utility import PriorityQueue, Dice
+
+# This file contains microbenchmarks for the game's hot paths, each timed on its own.
+# Run with: python -m pyrogue.microbench; see python -m pyrogue.microbench --help for options.
+# Every run of a benchmark starts from the same seed, so the runs (and separate invocations) do the same work;
+# the fastest run is the one to compare, being the least disturbed by the rest of the machine.
+
+
+# Dungeon sizes beyond the main menu's presets; generating these is slow, so they're opt-in with --synthetic
+synthetic_sizes = [(60, 120), (100, 200)]
+
+# Monster attributes that change how a monster takes its turn; every combination of them is timed
+turn_attributes = [
+    ("INTELLIGENT", ATTR_INTELLIGENT),
+    ("TELEPATHIC", ATTR_TELEPATHIC_),
+    ("TUNNEL", ATTR_TUNNEL_____),
+    ("ERRATIC", ATTR_ERRATIC____),
+    ("PASS", ATTR_PASS_______),
+]
+
+
+# Times op(state) for each of repeat runs, with state made fresh for every run by setup() (which isn't timed).
+# ops is the number of operations that op does per run. Returns a dict of the per-operation times in microseconds.
+def time_op(setup, op, ops: int, repeat: int, seed: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        random.seed(seed)
+        state = setup()
+        start = time.perf_counter()
+        op(state)
+        times.append((time.perf_counter() - start) / ops * 1e6)
+    times.sort()
+    return {
+        "ops": ops,
+        "min_us": times[0],
+        "median_us": times[len(times) // 2],
+        "max_us": times[-1],
+    }
+
+
+# Generates a dungeon with the given seed, keeping generation's prints out of the benchmark output.
+def _generated_dungeon(size_h: int, size_w: int, seed: int) -> Dungeon:
+    random.seed(seed)
+    dungeon = Dungeon(size_h, size_w)
+    with contextlib.redirect_stdout(io.StringIO()):
+        dungeon.generate_dungeon()
+    return dungeon
+
+
+# Returns count random floor positions (row, col) of the dungeon.
+def _random_floor(dungeon: Dungeon, count: int) -> list:
+    floor = [
+        (r, c)
+        for r in range(dungeon.get_height())
+        for c in range(dungeon.get_width())
+        if dungeon.get_rock_at(r, c) == 0
+    ]
+    return [random.choice(floor) for _ in range(count)]
+
+
+# Returns count positions of a random walk over the dungeon's floor, starting from a random floor position.
+def _random_walk(dungeon: Dungeon, count: int) -> list:
+    r, c = _random_floor(dungeon, 1)[0]
+    walk = []
+    while len(walk) < count:
+        dr, dc = random.choice([(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)])
+        if dungeon.get_rock_at(r + dr, c + dc) == 0:
+            r, c = r + dr, c + dc
+            walk.append((r, c))
+    return walk
+
+
+# Times Dungeon.generate_dungeon; one operation is one dungeon.
+def bench_generate_dungeon(size_h: int, size_w: int, repeat: int, seed: int) -> dict:
+    def generate(dungeon):
+        with contextlib.redirect_stdout(io.StringIO()):
+            dungeon.generate_dungeon()
+
+    return time_op(lambda: Dungeon(size_h, size_w), generate, 1, repeat, seed)
+
+
+# Times Dungeon.calc_dist_maps, along with getting both distance maps; that's when they're brought up to date.
+# Origins are either random floor positions (each one a full recalculation), or the steps of a random walk,
+# like the player walking around. One operation is one origin.
+def bench_calc_dist_maps(dungeon: Dungeon, walk: bool, repeat: int, seed: int) -> dict:
+    count = 100 if walk else 20
+
+    def setup():
+        test_dungeon = copy.deepcopy(dungeon)
+        origins = _random_walk(test_dungeon, count) if walk else _random_floor(test_dungeon, count)
+        return test_dungeon, origins
+
+    def calc(state):
+        test_dungeon, origins = state
+        for r, c in origins:
+            test_dungeon.calc_dist_maps(r, c)
+            test_dungeon.get_walking_distmap()
+            test_dungeon.get_tunneling_distmap()
+
+    return time_op(setup, calc, count, repeat, seed)
+
+
+# Times Player._update_terrain_memory (the player's field of view) from random floor positions.
+# One operation is one update.
+def bench_update_terrain_memory(dungeon: Dungeon, repeat: int, seed: int) -> dict:
+    count = 100
+
+    def setup():
+        test_dungeon = copy.deepcopy(dungeon)
+        actor_map = [[None] * test_dungeon.get_width() for _ in range(test_dungeon.get_height())]
+        player = Player()
+        positions = _random_floor(test_dungeon, count)
+        player.init_pos(test_dungeon, actor_map, *positions[0])
+        return test_dungeon, player, positions
+
+    def update(state):
+        test_dungeon, player, positions = state
+        for player.r, player.c in positions:
+            player._update_terrain_memory(test_dungeon)
+
+    return time_op(setup, update, count, repeat, seed)
+
+
+# Times Monster.handle_turn for monsters with the given attributes, chasing a player that doesn't move.
+# One operation is one monster turn.
+def bench_monster_turn(
+    dungeon: Dungeon, typedef: Monster_Typedef, attributes: int, repeat: int, seed: int
+) -> dict:
+    monsterc = 10
+    rounds = 20
+
+    def setup():
+        test_dungeon = copy.deepcopy(dungeon)
+        actor_map = [[None] * test_dungeon.get_width() for _ in range(test_dungeon.get_height())]
+        item_map = [[None] * test_dungeon.get_width() for _ in range(test_dungeon.get_height())]
+        positions = _random_floor(test_dungeon, monsterc * 4)
+        player = Player()
+        player.init_pos(test_dungeon, actor_map, *positions[0])
+        # Keep the player alive; only the monsters' turns are being timed
+        player.hp_cap = player.hp = sys.maxsize
+        monster_list = []
+        for r, c in positions[1:]:
+            monster = Monster(typedef)
+            monster.attributes = attributes
+            if len(monster_list) < monsterc and monster.init_pos(test_dungeon, actor_map, r, c):
+                monster_list.append(monster)
+        return test_dungeon, actor_map, item_map, player, monster_list
+
+    def take_turns(state):
+        test_dungeon, actor_map, item_map, player, monster_list = state
+        for _ in range(rounds):
+            for monster in monster_list:
+                monster.handle_turn(test_dungeon, actor_map, [], item_map, player, 8)
+
+    return time_op(setup, take_turns, monsterc * rounds, repeat, seed)
+
+
+# Times Monster._has_pc_los for monsters at random floor positions, with the player taking a random walk.
+# Each player position is checked by every monster a few times, like monsters taking turns between the player's.
+# One operation is one check.
+def bench_has_pc_los(dungeon: Dungeon, typedef: Monster_Typedef, repeat: int, seed: int) -> dict:
+    monsterc = 20
+    steps = 50
+    checks_per_step = 2
+
+    def setup():
+        test_dungeon = copy.deepcopy(dungeon)
+        actor_map = [[None] * test_dungeon.get_width() for _ in range(test_dungeon.get_height())]
+        walk = _random_walk(test_dungeon, steps)
+        player = Player()
+        player.init_pos(test_dungeon, actor_map, *walk[0])
+        monster_list = []
+        for r, c in _random_floor(test_dungeon, monsterc):
+            monster = Monster(typedef)
+            monster.r, monster.c = r, c
+            monster_list.append(monster)
+        return test_dungeon, player, walk, monster_list
+
+    def check(state):
+        test_dungeon, player, walk, monster_list = state
+        for player.r, player.c in walk:
+            for _ in range(checks_per_step):
+                for monster in monster_list:
+                    monster._has_pc_los(test_dungeon, player)
+
+    return time_op(setup, check, monsterc * steps * checks_per_step, repeat, seed)
+
+
+# Times PriorityQueue push (new nodes), push (existing nodes, lowering their priority), and pop for a queue of size nodes.
+# Returns a dict of results for each; one operation is one push / pop.
+def bench_priority_queue(size: int, repeat: int, seed: int) -> dict:
+    # Nodes just need to be hashable and distinct, like the actors in the turn queue
+    def setup():
+        nodes = [object() for _ in range(size)]
+        priorities = [random.randint(0, 1_000_000) for _ in range(size)]
+        return nodes, priorities
+
+    def push(state):
+        nodes, priorities = state
+        queue = PriorityQueue()
+        for node, priority in zip(nodes, priorities):
+            queue.push(node, priority)
+
+    def setup_full():
+        nodes, priorities = setup()
+        queue = PriorityQueue()
+        for node, priority in zip(nodes, priorities):
+            queue.push(node, priority)
+        return queue, nodes, priorities
+
+    def decrease(state):
+        queue, nodes, priorities = state
+        for node, priority in zip(nodes, priorities):
+            queue.push(node, priority // 2)
+
+    def pop(state):
+        queue = state[0]
+        for _ in range(size):
+            queue.pop()
+
+    return {
+        "push": time_op(setup, push, size, repeat, seed),
+        "push_existing": time_op(setup_full, decrease, size, repeat, seed),
+        "pop": time_op(setup_full, pop, size, repeat, seed),
+    }
+
+
+# Times Dice.roll for dice of the given (base, rolls, sides). One operation is one roll.
+def bench_dice_roll(base: int, rolls: int, sides: int, repeat: int, seed: int) -> dict:
+    count = 10_000
+
+    def roll(dice):
+        for _ in range(count):
+            dice.roll()
+
+    return time_op(lambda: Dice(base, rolls, sides), roll, count, repeat, seed)
+
+
+# Returns a label for a monster attribute bitfield, e.g. "INTELLIGENT+TUNNEL".
+def _attributes_label(attributes: int) -> str:
+    names = [name for name, attr in turn_attributes if has_attribute(attributes, attr)]
+    return "+".join(names) if names else "NONE"
+
+
+# Prints one row of the results table.
+def _print_result(name: str, param: str, result: dict, out):
+    print(
+        f"{name:<28} {param:<52} {result['ops']:>6} {result['min_us']:>12.2f}"
+        f" {result['median_us']:>12.2f} {result['max_us']:>12.2f}",
+        file=out,
+    )
+
+
+# Command line entry point; runs every benchmark, printing a table of the results and optionally writing them as JSON.
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pyrogue.microbench",
+        description="Times PyRogue's hot paths, each on its own, with fixed seeds.",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each benchmark (default 5)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default 0)")
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help=f"also time dungeon sizes {', '.join(f'{h}x{w}' for h, w in synthetic_sizes)}; slow to generate",
+    )
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON to PATH ('-' for stdout)")
+    args = parser.parse_args(argv)
+    # Table goes to stderr when the JSON goes to stdout
+    out = sys.stderr if args.json == "-" else sys.stdout
+    results = {"seed": args.seed, "repeat": args.repeat, "benchmarks": []}
+
+    def report(name: str, param: str, result: dict):
+        _print_result(name, param, result, out)
+        results["benchmarks"].append({"name": name, "param": param, **result})
+
+    sizes = list(dungeon_size_setting.values())
+    if args.synthetic:
+        sizes += synthetic_sizes
+
+    monster_type_list = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_monster_typedefs(monster_type_list)
+    # Attributes are set per benchmark, so any type will do
+    typedef = monster_type_list[0]
+
+    print(f"Times per operation in microseconds; fastest, median and slowest of {args.repeat} runs", file=out)
+    print(f"{'BENCHMARK':<28} {'PARAMETERS':<52} {'OPS':>6} {'MIN us':>12} {'MEDIAN us':>12} {'MAX us':>12}", file=out)
+
+    for size_h, size_w in sizes:
+        size = f"{size_h}x{size_w}"
+        report("generate_dungeon", size, bench_generate_dungeon(size_h, size_w, args.repeat, args.seed))
+
+        dungeon = _generated_dungeon(size_h, size_w, args.seed)
+        report("calc_dist_maps", f"{size} random origins", bench_calc_dist_maps(dungeon, False, args.repeat, args.seed))
+        report("calc_dist_maps", f"{size} walking origin", bench_calc_dist_maps(dungeon, True, args.repeat, args.seed))
+        report("_update_terrain_memory", size, bench_update_terrain_memory(dungeon, args.repeat, args.seed))
+        report("Monster._has_pc_los", size, bench_has_pc_los(dungeon, typedef, args.repeat, args.seed))
+
+        for combo in range(1 << len(turn_attributes)):
+            attributes = 0
+            for bit, (_, attr) in enumerate(turn_attributes):
+                if combo & (1 << bit):
+                    attributes = add_attribute(attributes, attr)
+            report(
+                "Monster.handle_turn",
+                f"{size} {_attributes_label(attributes)}",
+                bench_monster_turn(dungeon, typedef, attributes, args.repeat, args.seed),
+            )
+
+    for size in (64, 1024, 16384):
+        for op, result in bench_priority_queue(size, args.repeat, args.seed).items():
+            report(f"PriorityQueue {op}", f"{size} nodes", result)
+
+    for base, rolls, sides in ((0, 1, 6), (0, 2, 6), (10, 5, 10), (0, 20, 20)):
+        dice = Dice(base, rolls, sides)
+        report("Dice.roll", str(dice), bench_dice_roll(base, rolls, sides, args.repeat, args.seed))
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()